@@ -9,9 +9,10 @@ from src.config import settings
 from src.database import Base
 
 from src.users.models import User
-from src.expenses.models import Expense
+from src.expenses.models import Expense, ExpenseMonthlyRollup
 from src.budgets.models import Budget
-from src.categories.models import Category
+from src.categories.models import Category, CategoryTermCount
+from src.agents.models import AgentCheckpoint, AgentCheckpointWrite
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
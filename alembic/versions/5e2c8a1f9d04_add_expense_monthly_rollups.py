@@ -0,0 +1,51 @@
+"""add expense monthly rollups
+
+Revision ID: 5e2c8a1f9d04
+Revises: d3a61f0c9b72
+Create Date: 2026-10-18 10:41:37.206914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2c8a1f9d04'
+down_revision: Union[str, Sequence[str], None] = 'd3a61f0c9b72'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('expense_monthly_rollups',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('budget_id', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'month', 'category_id', 'budget_id')
+    )
+    # Backfill; later changes are applied by the expense write paths
+    op.execute(
+        """
+        INSERT INTO expense_monthly_rollups (user_id, month, category_id, budget_id, total, count)
+        SELECT user_id,
+               coalesce(date_trunc('month', date_spent)::date, date '0001-01-01'),
+               coalesce(category_id, 0),
+               coalesce(budget_id, 0),
+               sum(amount),
+               count(*)
+        FROM expenses
+        GROUP BY 1, 2, 3, 4
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('expense_monthly_rollups')
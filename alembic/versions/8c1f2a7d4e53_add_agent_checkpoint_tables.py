@@ -0,0 +1,51 @@
+"""add agent checkpoint tables
+
+Revision ID: 8c1f2a7d4e53
+Revises: 39646af0486f
+Create Date: 2026-10-18 09:02:11.418203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c1f2a7d4e53'
+down_revision: Union[str, Sequence[str], None] = '39646af0486f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('agent_checkpoints',
+    sa.Column('thread_id', sa.String(length=255), nullable=False),
+    sa.Column('checkpoint_ns', sa.String(length=255), nullable=False),
+    sa.Column('checkpoint_id', sa.String(length=64), nullable=False),
+    sa.Column('parent_checkpoint_id', sa.String(length=64), nullable=True),
+    sa.Column('type', sa.String(length=64), nullable=True),
+    sa.Column('checkpoint', sa.LargeBinary(), nullable=False),
+    sa.Column('checkpoint_metadata', sa.LargeBinary(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('thread_id', 'checkpoint_ns', 'checkpoint_id')
+    )
+    op.create_table('agent_checkpoint_writes',
+    sa.Column('thread_id', sa.String(length=255), nullable=False),
+    sa.Column('checkpoint_ns', sa.String(length=255), nullable=False),
+    sa.Column('checkpoint_id', sa.String(length=64), nullable=False),
+    sa.Column('task_id', sa.String(length=64), nullable=False),
+    sa.Column('idx', sa.Integer(), nullable=False),
+    sa.Column('channel', sa.String(length=255), nullable=False),
+    sa.Column('type', sa.String(length=64), nullable=True),
+    sa.Column('value', sa.LargeBinary(), nullable=True),
+    sa.Column('task_path', sa.String(length=255), nullable=False),
+    sa.PrimaryKeyConstraint('thread_id', 'checkpoint_ns', 'checkpoint_id', 'task_id', 'idx')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('agent_checkpoint_writes')
+    op.drop_table('agent_checkpoints')
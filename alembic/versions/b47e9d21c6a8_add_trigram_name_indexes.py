@@ -0,0 +1,35 @@
+"""add trigram name indexes
+
+Revision ID: b47e9d21c6a8
+Revises: 8c1f2a7d4e53
+Create Date: 2026-10-18 09:41:27.905114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b47e9d21c6a8'
+down_revision: Union[str, Sequence[str], None] = '8c1f2a7d4e53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # btree_gin lets the integer user_id share the GIN index with the trigram name
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gin')
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index('ix_categories_user_id_name_trgm', 'categories', ['user_id', 'name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_budgets_user_id_name_trgm', 'budgets', ['user_id', 'name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_budgets_user_id_name_trgm', table_name='budgets', postgresql_using='gin', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_categories_user_id_name_trgm', table_name='categories', postgresql_using='gin', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,39 @@
+"""add per-user composite indexes
+
+Revision ID: d3a61f0c9b72
+Revises: b47e9d21c6a8
+Create Date: 2026-10-18 10:12:53.260417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a61f0c9b72'
+down_revision: Union[str, Sequence[str], None] = 'b47e9d21c6a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index('ix_expenses_user_id_date_spent_id', 'expenses', ['user_id', sa.text('date_spent DESC NULLS LAST'), sa.text('id DESC')], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_expenses_user_id_category_id', 'expenses', ['user_id', 'category_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_expenses_user_id_budget_id', 'expenses', ['user_id', 'budget_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_categories_user_id_lower_name', 'categories', ['user_id', sa.text('lower(name)')], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_budgets_user_id_budget_period', 'budgets', ['user_id', 'budget_period'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_budgets_user_id_budget_period', table_name='budgets', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_categories_user_id_lower_name', table_name='categories', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_expenses_user_id_budget_id', table_name='expenses', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_expenses_user_id_category_id', table_name='expenses', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_expenses_user_id_date_spent_id', table_name='expenses', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,76 @@
+"""add category term counts
+
+Revision ID: e71b5c93a0f2
+Revises: 5e2c8a1f9d04
+Create Date: 2026-10-18 14:05:12.583417
+
+"""
+import re
+from collections import defaultdict
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e71b5c93a0f2'
+down_revision: Union[str, Sequence[str], None] = '5e2c8a1f9d04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The tokenization of src.categories.classifier as of this revision, so the
+# backfill does not change with the application code
+_WORD = re.compile(r"[^\W_]+")
+
+
+def description_terms(description):
+    grams = set()
+    words = _WORD.findall(description.lower())
+    for word in words:
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams | {f"w:{word[:32]}" for word in words}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    terms = op.create_table('category_term_counts',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('term', sa.String(length=40), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'category_id', 'term')
+    )
+    # Backfill in Python, where descriptions are split into terms; later
+    # changes are applied by the expense write paths
+    expenses = sa.table(
+        'expenses',
+        sa.column('user_id', sa.Integer),
+        sa.column('category_id', sa.Integer),
+        sa.column('description', sa.String),
+    )
+    counts = defaultdict(int)
+    rows = op.get_bind().execute(
+        sa.select(expenses).where(expenses.c.category_id.is_not(None))
+    )
+    for row in rows:
+        if not row.description:
+            continue
+        counts[row.user_id, row.category_id, ''] += 1
+        for term in description_terms(row.description):
+            counts[row.user_id, row.category_id, term] += 1
+    op.bulk_insert(
+        terms,
+        [
+            {'user_id': user_id, 'category_id': category_id, 'term': term, 'count': count}
+            for (user_id, category_id, term), count in counts.items()
+        ],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('category_term_counts')
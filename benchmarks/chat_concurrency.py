@@ -0,0 +1,73 @@
+"""Pool pressure of concurrent chat turns: a session per request vs. per tool call.
+
+Each simulated turn streams from the model for ``--model-ms``, runs a tool
+(one indexed read through ``CategoryRepository``), then streams again, the
+shape of a typical chat turn. ``--turns`` turns run concurrently two ways:
+
+- request: one session checked out for the whole turn, the old dependency
+- tool call: ``AgentContext.session()`` around the tool only
+
+and the pool's checkout waits and timeouts are reported for each.
+
+    python -m benchmarks.chat_concurrency --user-id 1 --turns 100 --model-ms 500
+"""
+
+import argparse
+import asyncio
+import time
+
+# Register the mappers Category's relationships refer to
+import src.budgets.models  # noqa: F401
+import src.expenses.models  # noqa: F401
+from src.agents.context import AgentContext
+from src.categories.repositories import CategoryRepository
+from src.database import Database
+
+
+async def per_request_turn(user_id: int, model_seconds: float):
+    async with Database.async_session() as session:
+        await session.connection()
+        await asyncio.sleep(model_seconds)
+        await CategoryRepository(session).list_categories(user_id)
+        await asyncio.sleep(model_seconds)
+
+
+async def per_tool_call_turn(user_id: int, model_seconds: float):
+    context = AgentContext(session_factory=Database.async_session, user_id=user_id)
+    await asyncio.sleep(model_seconds)
+    async with context.session() as session:
+        await CategoryRepository(session).list_categories(user_id)
+    await asyncio.sleep(model_seconds)
+
+
+async def measure(label: str, turn, user_id: int, turns: int, model_seconds: float):
+    Database.connect()
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(turn(user_id, model_seconds) for _ in range(turns)), return_exceptions=True
+    )
+    elapsed = time.perf_counter() - start
+    stats = Database.pool_stats()
+    failed = sum(isinstance(result, Exception) for result in results)
+    await Database.close()
+
+    print(
+        f"{label:10} wall {elapsed:7.2f} s  failed {failed:4d}"
+        f"  avg wait {stats['avg_wait_ms']:9.3f} ms  max wait {stats['max_wait_ms']:9.3f} ms"
+        f"  timeouts {stats['timeouts']}"
+    )
+
+
+async def main(user_id: int, turns: int, model_ms: int):
+    model_seconds = model_ms / 1000
+    await measure("request", per_request_turn, user_id, turns, model_seconds)
+    await measure("tool call", per_tool_call_turn, user_id, turns, model_seconds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--model-ms", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.user_id, args.turns, args.model_ms))
@@ -0,0 +1,85 @@
+"""Chat stream throughput: frames per second vs. bytes per frame.
+
+Serves ``--tokens`` synthetic model tokens as an SSE chat stream from a local
+uvicorn server and reads it back with httpx, once per frame size:
+
+- raw: one frame per token, the old uncoalesced stream
+- N bytes: tokens coalesced by ``coalesce_tokens`` into frames of N bytes
+
+    python -m benchmarks.chat_stream_frames --tokens 20000 --sizes 16 64 256 1024
+"""
+
+import argparse
+import asyncio
+import socket
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+from src.agents.streaming import DONE, TOKEN, coalesce_tokens, sse_stream
+
+app = FastAPI()
+
+
+async def synthetic_events(tokens: int):
+    for i in range(tokens):
+        yield TOKEN, {"text": f" tok{i % 100}"}
+        if i % 64 == 0:
+            await asyncio.sleep(0)  # a model stream yields to the loop between reads
+    yield DONE, {}
+
+
+@app.get("/stream")
+async def stream(tokens: int, frame_bytes: int = 0, window: float = 0.02):
+    events = synthetic_events(tokens)
+    if frame_bytes:
+        events = coalesce_tokens(events, frame_bytes, window)
+    return StreamingResponse(sse_stream(events), media_type="text/event-stream")
+
+
+async def measure(client: httpx.AsyncClient, tokens: int, frame_bytes: int):
+    frames = received = 0
+    start = time.perf_counter()
+    async with client.stream(
+        "GET", "/stream", params={"tokens": tokens, "frame_bytes": frame_bytes}
+    ) as response:
+        async for chunk in response.aiter_bytes():
+            received += len(chunk)
+            frames += chunk.count(b"\n\n")
+    elapsed = time.perf_counter() - start
+
+    label = f"{frame_bytes} bytes" if frame_bytes else "raw"
+    print(
+        f"{label:11} frames {frames:7d}  {received / frames:8.1f} B/frame"
+        f"  {frames / elapsed:9.0f} frames/s  {tokens / elapsed:9.0f} tokens/s"
+        f"  {elapsed * 1000:8.1f} ms"
+    )
+
+
+async def main(tokens: int, sizes: list[int]):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=None) as client:
+            for frame_bytes in (0, *sizes):
+                await measure(client, tokens, frame_bytes)
+    finally:
+        server.should_exit = True
+        await serving
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=20000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 64, 256, 1024])
+    args = parser.parse_args()
+    asyncio.run(main(args.tokens, args.sizes))
@@ -0,0 +1,74 @@
+"""Cold-start import time of the app, with a per-module breakdown.
+
+Imports ``--module`` (default ``src.main``, what a worker loads on boot) in
+``--runs`` fresh interpreters under ``python -X importtime`` and prints:
+
+- wall time of the whole interpreter start + import, median and min
+- import time per top-level package, self time summed over its modules
+- the ``--top`` slowest modules by cumulative time
+
+Run from the repository root with the app's environment (``.env``) in place:
+
+    python -m benchmarks.cold_start --runs 5 --top 20
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+
+def import_once(module: str) -> tuple[float, list[tuple[str, int, int]]]:
+    """Import ``module`` in a fresh interpreter; returns wall seconds and (module, self us, cumulative us)."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    elapsed = time.perf_counter() - start
+
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return elapsed, modules
+
+
+def main(module: str, runs: int, top: int):
+    walls = []
+    for _ in range(runs):
+        elapsed, modules = import_once(module)
+        walls.append(elapsed)
+
+    print(
+        f"import {module}: median {statistics.median(walls) * 1000:.0f} ms"
+        f"  min {min(walls) * 1000:.0f} ms  over {runs} runs"
+    )
+
+    # Breakdown of the last run
+    packages = defaultdict(int)
+    for name, self_us, _ in modules:
+        packages[name.split(".")[0]] += self_us
+    total = sum(packages.values())
+    print(f"\nby package (self time, {total / 1000:.0f} ms in total)")
+    for package, self_us in sorted(packages.items(), key=lambda p: -p[1])[:top]:
+        print(f"  {package:30} {self_us / 1000:8.1f} ms  {self_us / total:6.1%}")
+
+    print("\nslowest modules (cumulative)")
+    for name, _, cumulative_us in sorted(modules, key=lambda m: -m[2])[:top]:
+        print(f"  {name:60} {cumulative_us / 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="src.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+    main(args.module, args.runs, args.top)
@@ -0,0 +1,116 @@
+"""Expense write throughput: per-row create_expense vs. the bulk CSV import.
+
+Inserts ``--rows`` generated expenses for a user both ways, reports rows per
+second and deletes what it inserted. Run from the repository root against a
+migrated database:
+
+    python -m benchmarks.expense_import --user-id 1 --rows 5000
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import date, timedelta
+
+from sqlalchemy import delete
+
+from src.database import Database
+from src.expenses.importer import ImportProgress
+from src.expenses.models import Expense
+from src.expenses.repositories import WRITE_COLUMNS, ExpenseRepository
+from src.expenses.schemas import ExpenseIn
+from src.expenses.service import ExpenseService
+
+
+def generate_rows(marker: str, rows: int):
+    start = date(2024, 1, 1)
+    for i in range(rows):
+        yield (
+            f"{marker} {i}",
+            round(1 + (i * 7919) % 50000 / 100, 2),
+            (start + timedelta(days=i % 365)).isoformat(),
+        )
+
+
+async def csv_chunks(marker: str, rows: int, chunk_rows: int = 500):
+    lines = ["description,amount,date_spent\n"]
+    for description, amount, date_spent in generate_rows(marker, rows):
+        lines.append(f"{description},{amount},{date_spent}\n")
+        if len(lines) >= chunk_rows:
+            yield "".join(lines).encode()
+            lines = []
+    if lines:
+        yield "".join(lines).encode()
+
+
+async def per_row(marker: str, user_id: int, rows: int) -> float:
+    start = time.perf_counter()
+    async with Database.async_session() as session:
+        repository = ExpenseRepository(session)
+        for description, amount, date_spent in generate_rows(marker, rows):
+            await repository.create_expense(
+                ExpenseIn(
+                    description=description,
+                    amount=amount,
+                    date_spent=date_spent,
+                    user_id=user_id,
+                )
+            )
+    return time.perf_counter() - start
+
+
+async def bulk(marker: str, user_id: int, rows: int) -> float:
+    start = time.perf_counter()
+    async with Database.async_session() as session:
+        progress = ImportProgress(import_id=marker, user_id=user_id)
+        await ExpenseService(session, user_id).import_expenses(
+            csv_chunks(marker, rows), "csv", progress
+        )
+    assert progress.imported == rows, progress.to_dict()
+    return time.perf_counter() - start
+
+
+async def cleanup(marker: str, user_id: int):
+    """Delete the benchmark's expenses and take them off the rollups and balances."""
+    table = Expense.__table__
+    async with Database.async_session() as session:
+        stmt = (
+            delete(table)
+            .where(table.c.user_id == user_id, table.c.description.startswith(marker))
+            .returning(*WRITE_COLUMNS)
+        )
+        deleted = (await session.execute(stmt)).all()
+        await ExpenseRepository(session)._apply_writes(removed=deleted)
+        await session.commit()
+
+
+async def main(user_id: int, rows: int, per_row_rows: int):
+    Database.connect()
+    marker = f"bench-{uuid.uuid4().hex[:8]}"
+    try:
+        per_row_seconds = await per_row(f"{marker}-row", user_id, per_row_rows)
+        bulk_seconds = await bulk(f"{marker}-bulk", user_id, rows)
+    finally:
+        await cleanup(marker, user_id)
+        await Database.close()
+
+    per_row_rate = per_row_rows / per_row_seconds
+    bulk_rate = rows / bulk_seconds
+    print(f"per-row create_expense: {per_row_rate:10.0f} rows/s ({per_row_rows} rows)")
+    print(f"bulk import:            {bulk_rate:10.0f} rows/s ({rows} rows)")
+    print(f"speedup:                {bulk_rate / per_row_rate:10.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--rows", type=int, default=5000, help="rows for the bulk import")
+    parser.add_argument(
+        "--per-row-rows",
+        type=int,
+        default=500,
+        help="rows for the per-row path, which is much slower",
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.user_id, args.rows, args.per_row_rows))
@@ -0,0 +1,88 @@
+"""Print the query plan of every repository read path.
+
+Runs each repository method once for a user, captures the SQL it sends and
+prints ``EXPLAIN (ANALYZE, BUFFERS)`` for it. Run it before and after
+``alembic upgrade head`` and diff the two reports:
+
+    python -m benchmarks.explain_queries --user-id 1 > before.txt
+    alembic upgrade head
+    python -m benchmarks.explain_queries --user-id 1 > after.txt
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from src.budgets.repositories import BudgetRepository
+from src.cache import lookup_cache
+from src.categories.repositories import CategoryRepository
+from src.database import Database
+from src.expenses.repositories import ExpenseRepository
+
+
+def repository_calls(session, user_id: int):
+    expenses = ExpenseRepository(session)
+    categories = CategoryRepository(session)
+    budgets = BudgetRepository(session)
+    month_ago = datetime.now() - timedelta(days=30)
+    return [
+        ("list_expenses", lambda: expenses.list_expenses(user_id, limit=20)),
+        (
+            "list_expenses (category, last 30 days)",
+            lambda: expenses.list_expenses(user_id, category_id=1, date_from=month_ago),
+        ),
+        ("list_expenses (budget)", lambda: expenses.list_expenses(user_id, budget_id=1)),
+        (
+            "summarize_expenses (month, category)",
+            lambda: expenses.summarize_expenses(user_id, ["month", "category"]),
+        ),
+        ("top_expenses", lambda: expenses.top_expenses(user_id, 5)),
+        ("list_categories", lambda: categories.list_categories(user_id)),
+        ("search_categories", lambda: categories.search_categories("food", user_id)),
+        ("get_category_by_id", lambda: categories.get_category_by_id(1, user_id)),
+        ("list_budgets", lambda: budgets.list_budgets(user_id)),
+        ("search_budgets", lambda: budgets.search_budgets("monthly", user_id)),
+        ("get_budget_by_id", lambda: budgets.get_budget_by_id(1, user_id)),
+    ]
+
+
+async def main(user_id: int, analyze: bool):
+    Database.connect()
+    captured: list[tuple[str, object]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(Database.engine.sync_engine, "before_cursor_execute", capture)
+    explain = "EXPLAIN (ANALYZE, BUFFERS)" if analyze else "EXPLAIN"
+    try:
+        async with Database.async_session() as session:
+            for name, call in repository_calls(session, user_id):
+                lookup_cache.clear()
+                captured.clear()
+                await call()
+                for statement, parameters in captured:
+                    connection = await session.connection()
+                    result = await connection.exec_driver_sql(
+                        f"{explain} {statement}", parameters
+                    )
+                    print(f"=== {name}")
+                    print("\n".join(str(row[0]) for row in result))
+                    print()
+            await session.rollback()
+    finally:
+        event.remove(Database.engine.sync_engine, "before_cursor_execute", capture)
+        await Database.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument(
+        "--no-analyze", action="store_true", help="plan only, do not execute the queries"
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.user_id, analyze=not args.no_analyze))
@@ -0,0 +1,91 @@
+"""Write latency of the repositories: ORM add/commit/refresh vs. INSERT ... RETURNING.
+
+Creates ``--writes`` categories for a user three ways and deletes them again:
+
+- orm: ``session.add`` + ``commit`` + ``refresh``, the old repository path
+- returning: ``CategoryRepository.create_category``, one statement + commit
+- unit of work: the same inside ``unit_of_work``, one commit for all writes
+
+Run from the repository root against a migrated database:
+
+    python -m benchmarks.repository_writes --user-id 1 --writes 200
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from sqlalchemy import delete
+
+# Register the mappers Category's relationships refer to
+import src.budgets.models  # noqa: F401
+import src.expenses.models  # noqa: F401
+from src.categories.models import Category
+from src.categories.repositories import CategoryRepository
+from src.categories.schemas import CategoryIn
+from src.database import Database
+from src.repositories import unit_of_work
+
+
+async def orm_write(session, data: CategoryIn):
+    category = Category(**data.model_dump())
+    session.add(category)
+    await session.commit()
+    await session.refresh(category)
+    return category
+
+
+async def measure(label: str, marker: str, user_id: int, writes: int, deferred: bool):
+    timings = []
+    async with Database.async_session() as session:
+        repository = CategoryRepository(session)
+        start = time.perf_counter()
+        if deferred:
+            async with unit_of_work(session):
+                for i in range(writes):
+                    began = time.perf_counter()
+                    await repository.create_category(
+                        CategoryIn(name=f"{marker} {i}", user_id=user_id)
+                    )
+                    timings.append(time.perf_counter() - began)
+        else:
+            for i in range(writes):
+                data = CategoryIn(name=f"{marker} {i}", user_id=user_id)
+                began = time.perf_counter()
+                if label == "orm":
+                    await orm_write(session, data)
+                else:
+                    await repository.create_category(data)
+                timings.append(time.perf_counter() - began)
+        total = time.perf_counter() - start
+
+    timings.sort()
+    print(
+        f"{label:13} mean {statistics.mean(timings) * 1000:7.3f} ms"
+        f"  p95 {timings[int(len(timings) * 0.95)] * 1000:7.3f} ms"
+        f"  total {total * 1000:9.1f} ms"
+    )
+
+
+async def main(user_id: int, writes: int):
+    Database.connect()
+    marker = f"bench-{uuid.uuid4().hex[:8]}"
+    try:
+        await measure("orm", f"{marker}-orm", user_id, writes, deferred=False)
+        await measure("returning", f"{marker}-ret", user_id, writes, deferred=False)
+        await measure("unit of work", f"{marker}-uow", user_id, writes, deferred=True)
+    finally:
+        async with Database.async_session() as session:
+            await session.execute(delete(Category).where(Category.name.startswith(marker)))
+            await session.commit()
+        await Database.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--writes", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.user_id, args.writes))
@@ -1,34 +1,85 @@
+from typing import Annotated
+
 from langchain.agents import AgentState, create_agent
-from langchain_openai import ChatOpenAI
-from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.base import BaseCheckpointSaver
 
 from langgraph.graph.state import CompiledStateGraph
-from sqlalchemy.ext.asyncio.session import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from src.config import settings
 
+from src.agents.checkpointer import build_checkpointer
+from src.agents.context import AgentContext
+from src.agents.history import HistoryMiddleware
+from src.agents.preload import PreloadContextMiddleware
+from src.agents.suggestions import CategorySuggestionMiddleware
+from src.agents.unit_of_work import UnitOfWorkMiddleware
 from src.budgets.tools import BudgetsToolFactory
 from src.expenses.tools import ExpenseToolFactory
 from src.categories.tools import CategoriesToolFactory
 from src.utils import load_prompt
 
 
+def merge(left: dict | None, right: dict | None) -> dict:
+    """Reducer for name lookups: parallel tool calls each add their own entries."""
+    return {**(left or {}), **(right or {})}
+
+
+class ExpenseProAgentState(AgentState):
+    # ✅ Track extraction progress
+    expense_extraction: dict  # What's been extracted: {amount, description, category_id, etc}
+    pending_fields: list      # What's still needed: ["category_id", "budget_id"]
+    current_step: str         # Workflow step: "gathering", "confirming", "creating"
+
+    # Context (loaded once, persisted)
+    # Reducer channels start out as {}, so whether they were loaded is tracked apart
+    context_loaded: bool
+    budget_context: Annotated[dict, merge]
+    categories_context: Annotated[dict, merge]
+    extracted_budget_id: int | None
+    extracted_category_id: int | None
+
+
 class Agent:
-    """Main service orchestrating the expense insertion workflow."""
+    """Main service orchestrating the expense insertion workflow.
+
+    The compiled graph is shared by every request in the process; the
+    session factory and user are passed in as runtime context.
+    """
 
-    def __init__(self, session: AsyncSession, user_id: int):
-        self.session = session
+    graph: CompiledStateGraph | None = None
+    checkpointer: BaseCheckpointSaver | None = None
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession], user_id: int):
         self.user_id = user_id
+        self.context = AgentContext(session_factory=session_factory, user_id=user_id)
+        self.config = {"configurable": {"thread_id": f"user_{user_id}_session"}}
+
+    @classmethod
+    def build_graph(cls, checkpointer: BaseCheckpointSaver) -> CompiledStateGraph:
+        """Build and compile a new agent graph."""
+        # Imported here: langchain_openai pulls in the openai SDK, a large share
+        # of the app's import time, and only the graph needs it
+        from langchain_openai import ChatOpenAI
 
-    def load_agent(self):
-        """Process user message and process expense-related operations using AI agent."""
         model = ChatOpenAI(
-            model="gpt-4o-mini",
+            model=settings.AGENT_MODEL,
             api_key=settings.OPENAI_API_KEY,
             temperature=0,
             max_tokens=1500,
             timeout=30,
             streaming=True,
+            stream_usage=True,
+        )
+
+        # Not streamed, so summaries never leak into the chat response
+        summary_model = ChatOpenAI(
+            model=settings.AGENT_MODEL,
+            api_key=settings.OPENAI_API_KEY,
+            temperature=0,
+            max_tokens=settings.HISTORY_SUMMARY_MAX_TOKENS,
+            timeout=30,
+            disable_streaming=True,
         )
 
         system_prompt = load_prompt(
@@ -40,30 +91,44 @@ class Agent:
         )
 
         tools = [
-            *ExpenseToolFactory(self.session, self.user_id).all(),
-            *CategoriesToolFactory(self.session, self.user_id).all(),
-            *BudgetsToolFactory(self.session, self.user_id).all(),
+            *ExpenseToolFactory().all(),
+            *CategoriesToolFactory().all(),
+            *BudgetsToolFactory().all(),
         ]
 
-        class ExpenseProAgentState(AgentState):
-            # ✅ Track extraction progress
-            expense_extraction: dict  # What's been extracted: {amount, description, category_id, etc}
-            pending_fields: list      # What's still needed: ["category_id", "budget_id"]
-            current_step: str         # Workflow step: "gathering", "confirming", "creating"
-            
-            # Context (loaded once, persisted)
-            budget_context: dict
-            categories_context: dict
-            extracted_budget_id: int | None
-            extracted_category_id: int | None
-            
-            
-        agent = create_agent(
+        middleware = [
+            PreloadContextMiddleware(),
+            CategorySuggestionMiddleware(),
+            HistoryMiddleware(summary_model),
+        ]
+        if settings.AGENT_UNIT_OF_WORK:
+            middleware.insert(0, UnitOfWorkMiddleware())
+
+        return create_agent(
             model,
             system_prompt=system_prompt,
             tools=tools,
-            checkpointer=InMemorySaver(),
+            middleware=middleware,
+            checkpointer=checkpointer,
             state_schema=ExpenseProAgentState,
+            context_schema=AgentContext,
         )
 
-        return agent
+    @classmethod
+    def compile(cls):
+        if not cls.graph:
+            cls.checkpointer = build_checkpointer()
+            cls.graph = cls.build_graph(cls.checkpointer)
+
+    @classmethod
+    async def close(cls):
+        if close := getattr(cls.checkpointer, "close", None):
+            await close()
+        cls.graph = None
+        cls.checkpointer = None
+
+    def load_agent(self) -> CompiledStateGraph:
+        """Return the process-wide compiled agent graph."""
+        if not Agent.graph:
+            Agent.compile()
+        return Agent.graph
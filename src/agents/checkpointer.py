@@ -0,0 +1,635 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterator, Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+import ormsgpack
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from src.agents.models import AgentCheckpoint, AgentCheckpointWrite
+from src.config import settings
+from src.database import Database
+
+logger = logging.getLogger(__name__)
+
+
+class PostgresCheckpointSaver(BaseCheckpointSaver[str]):
+    """Async checkpoint saver that persists conversation state in the app database.
+
+    Every worker shares the same tables, so any of them can resume a thread.
+    Writes from the tasks of one super-step are grouped into a single INSERT,
+    and a background task keeps only the newest ``max_per_thread`` checkpoints
+    of each thread.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_per_thread: int = settings.CHECKPOINT_MAX_PER_THREAD,
+        compaction_interval: float = settings.CHECKPOINT_COMPACTION_INTERVAL,
+        serde=None,
+    ):
+        super().__init__(serde=serde)
+        self.max_per_thread = max_per_thread
+        self.compaction_interval = compaction_interval
+        self._pending_writes: list[tuple[dict, asyncio.Future]] = []
+        self._flush_task: asyncio.Task | None = None
+        self._dirty_threads: set[tuple[str, str]] = set()
+        self._compaction_task: asyncio.Task | None = None
+
+    @property
+    def engine(self):
+        if not Database.engine:
+            Database.connect()
+        return Database.engine
+
+    def _insert(self, model):
+        dialect = sqlite if self.engine.dialect.name == "sqlite" else postgresql
+        return dialect.insert(model)
+
+    def _config(self, thread_id, checkpoint_ns, checkpoint_id):
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+            }
+        }
+
+    async def _load_writes(self, conn, thread_id, checkpoint_ns, checkpoint_id):
+        stmt = (
+            select(AgentCheckpointWrite)
+            .where(
+                AgentCheckpointWrite.thread_id == thread_id,
+                AgentCheckpointWrite.checkpoint_ns == checkpoint_ns,
+                AgentCheckpointWrite.checkpoint_id == checkpoint_id,
+            )
+            .order_by(AgentCheckpointWrite.task_id, AgentCheckpointWrite.idx)
+        )
+        result = await conn.execute(stmt)
+        return [
+            (w.task_id, w.channel, self.serde.loads_typed((w.type, w.value)))
+            for w in result
+        ]
+
+    async def _to_tuple(self, conn, row) -> CheckpointTuple:
+        return CheckpointTuple(
+            config=self._config(row.thread_id, row.checkpoint_ns, row.checkpoint_id),
+            checkpoint=self.serde.loads_typed((row.type, row.checkpoint)),
+            metadata=self.serde.loads_typed((row.type, row.checkpoint_metadata)),
+            parent_config=(
+                self._config(row.thread_id, row.checkpoint_ns, row.parent_checkpoint_id)
+                if row.parent_checkpoint_id
+                else None
+            ),
+            pending_writes=await self._load_writes(
+                conn, row.thread_id, row.checkpoint_ns, row.checkpoint_id
+            ),
+        )
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        """Get the requested checkpoint, or the latest one of the thread."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        stmt = select(AgentCheckpoint).where(
+            AgentCheckpoint.thread_id == thread_id,
+            AgentCheckpoint.checkpoint_ns == checkpoint_ns,
+        )
+        if checkpoint_id := get_checkpoint_id(config):
+            stmt = stmt.where(AgentCheckpoint.checkpoint_id == checkpoint_id)
+        else:
+            stmt = stmt.order_by(AgentCheckpoint.checkpoint_id.desc()).limit(1)
+
+        async with self.engine.connect() as conn:
+            row = (await conn.execute(stmt)).first()
+            return await self._to_tuple(conn, row) if row else None
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        """List checkpoints newest first, optionally filtered by metadata."""
+        stmt = select(AgentCheckpoint).order_by(AgentCheckpoint.checkpoint_id.desc())
+        if config:
+            stmt = stmt.where(
+                AgentCheckpoint.thread_id == config["configurable"]["thread_id"]
+            )
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                stmt = stmt.where(AgentCheckpoint.checkpoint_ns == checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                stmt = stmt.where(AgentCheckpoint.checkpoint_id == checkpoint_id)
+        if before and (before_checkpoint_id := get_checkpoint_id(before)):
+            stmt = stmt.where(AgentCheckpoint.checkpoint_id < before_checkpoint_id)
+        if limit is not None and not filter:
+            stmt = stmt.limit(limit)
+
+        async with self.engine.connect() as conn:
+            rows = (await conn.execute(stmt)).all()
+            for row in rows:
+                if limit is not None and limit <= 0:
+                    break
+                checkpoint_tuple = await self._to_tuple(conn, row)
+                if filter and not all(
+                    checkpoint_tuple.metadata.get(key) == value
+                    for key, value in filter.items()
+                ):
+                    continue
+                if limit is not None:
+                    limit -= 1
+                yield checkpoint_tuple
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Store a checkpoint and schedule its thread for compaction."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        type_, checkpoint_b = self.serde.dumps_typed(checkpoint)
+        _, metadata_b = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        stmt = self._insert(AgentCheckpoint).values(
+            thread_id=thread_id,
+            checkpoint_ns=checkpoint_ns,
+            checkpoint_id=checkpoint["id"],
+            parent_checkpoint_id=config["configurable"].get("checkpoint_id"),
+            type=type_,
+            checkpoint=checkpoint_b,
+            checkpoint_metadata=metadata_b,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["thread_id", "checkpoint_ns", "checkpoint_id"],
+            set_={
+                "type": stmt.excluded.type,
+                "checkpoint": stmt.excluded.checkpoint,
+                "checkpoint_metadata": stmt.excluded.checkpoint_metadata,
+            },
+        )
+        async with self.engine.begin() as conn:
+            await conn.execute(stmt)
+
+        self._dirty_threads.add((thread_id, checkpoint_ns))
+        self._ensure_compaction_task()
+        return self._config(thread_id, checkpoint_ns, checkpoint["id"])
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Queue task writes; all writes queued in the same loop tick share one INSERT."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+
+        loop = asyncio.get_running_loop()
+        futures = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, value_b = self.serde.dumps_typed(value)
+            row = {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+                "task_id": task_id,
+                "idx": WRITES_IDX_MAP.get(channel, idx),
+                "channel": channel,
+                "type": type_,
+                "value": value_b,
+                "task_path": task_path,
+            }
+            future = loop.create_future()
+            self._pending_writes.append((row, future))
+            futures.append(future)
+
+        # The flush task only starts on the next loop iteration, so writes from
+        # other tasks of the same super-step join this batch.
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_writes())
+        await asyncio.gather(*futures)
+
+    async def _flush_writes(self):
+        while self._pending_writes:
+            batch, self._pending_writes = self._pending_writes, []
+            try:
+                await self._insert_writes([row for row, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+
+    async def _insert_writes(self, rows):
+        # Special channels (errors, interrupts, ...) overwrite; regular writes are idempotent.
+        upserts = [row for row in rows if row["idx"] < 0]
+        inserts = [row for row in rows if row["idx"] >= 0]
+        keys = ["thread_id", "checkpoint_ns", "checkpoint_id", "task_id", "idx"]
+        async with self.engine.begin() as conn:
+            if inserts:
+                stmt = self._insert(AgentCheckpointWrite).on_conflict_do_nothing(
+                    index_elements=keys
+                )
+                await conn.execute(stmt, inserts)
+            if upserts:
+                stmt = self._insert(AgentCheckpointWrite)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=keys,
+                    set_={
+                        "channel": stmt.excluded.channel,
+                        "type": stmt.excluded.type,
+                        "value": stmt.excluded.value,
+                        "task_path": stmt.excluded.task_path,
+                    },
+                )
+                await conn.execute(stmt, upserts)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """Delete all checkpoints and writes of a thread."""
+        async with self.engine.begin() as conn:
+            await conn.execute(
+                delete(AgentCheckpointWrite).where(
+                    AgentCheckpointWrite.thread_id == thread_id
+                )
+            )
+            await conn.execute(
+                delete(AgentCheckpoint).where(AgentCheckpoint.thread_id == thread_id)
+            )
+        self._dirty_threads = {t for t in self._dirty_threads if t[0] != thread_id}
+
+    def _ensure_compaction_task(self):
+        if self._compaction_task is None or self._compaction_task.done():
+            self._compaction_task = asyncio.create_task(self._compaction_loop())
+
+    async def _compaction_loop(self):
+        while True:
+            await asyncio.sleep(self.compaction_interval)
+            try:
+                await self.compact()
+            except Exception:
+                logger.exception("Checkpoint compaction failed")
+
+    async def compact(self):
+        """Drop all but the newest ``max_per_thread`` checkpoints of recently written threads."""
+        dirty, self._dirty_threads = self._dirty_threads, set()
+        for thread_id, checkpoint_ns in dirty:
+            async with self.engine.begin() as conn:
+                oldest_kept = (
+                    await conn.execute(
+                        select(AgentCheckpoint.checkpoint_id)
+                        .where(
+                            AgentCheckpoint.thread_id == thread_id,
+                            AgentCheckpoint.checkpoint_ns == checkpoint_ns,
+                        )
+                        .order_by(AgentCheckpoint.checkpoint_id.desc())
+                        .offset(self.max_per_thread - 1)
+                        .limit(1)
+                    )
+                ).scalar_one_or_none()
+                if oldest_kept is None:
+                    continue
+                await conn.execute(
+                    delete(AgentCheckpointWrite).where(
+                        AgentCheckpointWrite.thread_id == thread_id,
+                        AgentCheckpointWrite.checkpoint_ns == checkpoint_ns,
+                        AgentCheckpointWrite.checkpoint_id < oldest_kept,
+                    )
+                )
+                await conn.execute(
+                    delete(AgentCheckpoint).where(
+                        AgentCheckpoint.thread_id == thread_id,
+                        AgentCheckpoint.checkpoint_ns == checkpoint_ns,
+                        AgentCheckpoint.checkpoint_id < oldest_kept,
+                    )
+                )
+
+    async def close(self):
+        """Stop background compaction and flush anything still queued."""
+        if self._compaction_task:
+            self._compaction_task.cancel()
+            self._compaction_task = None
+        await self._flush_writes()
+
+
+
+@dataclass
+class _ThreadEntry:
+    # (checkpoint_ns, checkpoint_id) -> packed (type, checkpoint, metadata, parent_id)
+    checkpoints: dict[tuple[str, str], bytes] = field(default_factory=dict)
+    # (checkpoint_ns, checkpoint_id) -> (task_id, idx) -> packed (task_id, channel, type, value, task_path)
+    writes: dict[tuple[str, str], dict[tuple[str, int], bytes]] = field(default_factory=dict)
+    size: int = 0
+    last_access: float = field(default_factory=time.monotonic)
+
+
+class BoundedMemorySaver(BaseCheckpointSaver[str]):
+    """In-process checkpoint saver with a memory budget.
+
+    Checkpoints and writes are kept as ormsgpack blobs rather than live
+    objects. Threads idle for longer than ``ttl`` seconds are dropped, and
+    when the blobs exceed ``max_bytes`` the least recently used threads are
+    evicted until the store fits again. Each thread keeps at most
+    ``max_per_thread`` checkpoints.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int = settings.CHECKPOINT_MEMORY_BUDGET_BYTES,
+        ttl: float = settings.CHECKPOINT_TTL,
+        max_per_thread: int = settings.CHECKPOINT_MAX_PER_THREAD,
+        serde=None,
+    ):
+        super().__init__(serde=serde)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_per_thread = max_per_thread
+        self.threads: OrderedDict[str, _ThreadEntry] = OrderedDict()
+        self.resident_bytes = 0
+        self.lru_evictions = 0
+        self.ttl_evictions = 0
+
+    def stats(self) -> dict:
+        return {
+            "threads": len(self.threads),
+            "checkpoints": sum(len(t.checkpoints) for t in self.threads.values()),
+            "resident_bytes": self.resident_bytes,
+            "max_bytes": self.max_bytes,
+            "lru_evictions": self.lru_evictions,
+            "ttl_evictions": self.ttl_evictions,
+        }
+
+    def _touch(self, thread_id: str) -> _ThreadEntry | None:
+        entry = self.threads.get(thread_id)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.last_access > self.ttl:
+            self._drop(thread_id)
+            self.ttl_evictions += 1
+            return None
+        entry.last_access = time.monotonic()
+        self.threads.move_to_end(thread_id)
+        return entry
+
+    def _drop(self, thread_id: str):
+        entry = self.threads.pop(thread_id, None)
+        if entry:
+            self.resident_bytes -= entry.size
+
+    def _resize(self, entry: _ThreadEntry, delta: int):
+        entry.size += delta
+        self.resident_bytes += delta
+
+    def _evict(self, keep: str):
+        now = time.monotonic()
+        # Threads are kept in access order, so expired ones are at the front.
+        while self.threads:
+            thread_id, entry = next(iter(self.threads.items()))
+            if now - entry.last_access <= self.ttl:
+                break
+            self._drop(thread_id)
+            self.ttl_evictions += 1
+
+        while self.resident_bytes > self.max_bytes and len(self.threads) > 1:
+            thread_id = next(iter(self.threads))
+            if thread_id == keep:
+                self.threads.move_to_end(keep)
+                thread_id = next(iter(self.threads))
+            self._drop(thread_id)
+            self.lru_evictions += 1
+
+    def _trim_thread(self, entry: _ThreadEntry, checkpoint_ns: str):
+        ids = sorted(cid for ns, cid in entry.checkpoints if ns == checkpoint_ns)
+        for checkpoint_id in ids[: max(len(ids) - self.max_per_thread, 0)]:
+            key = (checkpoint_ns, checkpoint_id)
+            self._resize(entry, -len(entry.checkpoints.pop(key)))
+            for blob in entry.writes.pop(key, {}).values():
+                self._resize(entry, -len(blob))
+
+    def _to_tuple(self, thread_id, entry, checkpoint_ns, checkpoint_id) -> CheckpointTuple:
+        key = (checkpoint_ns, checkpoint_id)
+        type_, checkpoint_b, metadata_b, parent_checkpoint_id = ormsgpack.unpackb(
+            entry.checkpoints[key]
+        )
+        pending_writes = []
+        for blob in entry.writes.get(key, {}).values():
+            task_id, channel, value_type, value_b, _ = ormsgpack.unpackb(blob)
+            pending_writes.append(
+                (task_id, channel, self.serde.loads_typed((value_type, value_b)))
+            )
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=self.serde.loads_typed((type_, checkpoint_b)),
+            metadata=self.serde.loads_typed((type_, metadata_b)),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+            pending_writes=pending_writes,
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        """Get the requested checkpoint, or the latest one of the thread."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        entry = self._touch(thread_id)
+        if entry is None:
+            return None
+        if checkpoint_id := get_checkpoint_id(config):
+            if (checkpoint_ns, checkpoint_id) not in entry.checkpoints:
+                return None
+        else:
+            ids = [cid for ns, cid in entry.checkpoints if ns == checkpoint_ns]
+            if not ids:
+                return None
+            checkpoint_id = max(ids)
+        return self._to_tuple(thread_id, entry, checkpoint_ns, checkpoint_id)
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        """List checkpoints newest first, optionally filtered by metadata."""
+        thread_ids = [config["configurable"]["thread_id"]] if config else list(self.threads)
+        config_checkpoint_ns = config["configurable"].get("checkpoint_ns") if config else None
+        config_checkpoint_id = get_checkpoint_id(config) if config else None
+        before_checkpoint_id = get_checkpoint_id(before) if before else None
+
+        for thread_id in thread_ids:
+            entry = self._touch(thread_id)
+            if entry is None:
+                continue
+            for checkpoint_ns, checkpoint_id in sorted(
+                entry.checkpoints, key=lambda k: k[1], reverse=True
+            ):
+                if config_checkpoint_ns is not None and checkpoint_ns != config_checkpoint_ns:
+                    continue
+                if config_checkpoint_id and checkpoint_id != config_checkpoint_id:
+                    continue
+                if before_checkpoint_id and checkpoint_id >= before_checkpoint_id:
+                    continue
+                checkpoint_tuple = self._to_tuple(
+                    thread_id, entry, checkpoint_ns, checkpoint_id
+                )
+                if filter and not all(
+                    checkpoint_tuple.metadata.get(key) == value
+                    for key, value in filter.items()
+                ):
+                    continue
+                if limit is not None and limit <= 0:
+                    return
+                elif limit is not None:
+                    limit -= 1
+                yield checkpoint_tuple
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Store a checkpoint, then evict expired and least recently used threads."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        type_, checkpoint_b = self.serde.dumps_typed(checkpoint)
+        _, metadata_b = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        blob = ormsgpack.packb(
+            (type_, checkpoint_b, metadata_b, config["configurable"].get("checkpoint_id"))
+        )
+
+        entry = self._touch(thread_id)
+        if entry is None:
+            entry = self.threads[thread_id] = _ThreadEntry()
+        key = (checkpoint_ns, checkpoint["id"])
+        if old := entry.checkpoints.get(key):
+            self._resize(entry, -len(old))
+        entry.checkpoints[key] = blob
+        self._resize(entry, len(blob))
+
+        self._trim_thread(entry, checkpoint_ns)
+        self._evict(keep=thread_id)
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Store the pending writes of a task."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        entry = self._touch(thread_id)
+        if entry is None:
+            entry = self.threads[thread_id] = _ThreadEntry()
+
+        task_writes = entry.writes.setdefault((checkpoint_ns, checkpoint_id), {})
+        for idx, (channel, value) in enumerate(writes):
+            inner_key = (task_id, WRITES_IDX_MAP.get(channel, idx))
+            if inner_key[1] >= 0 and inner_key in task_writes:
+                continue
+            type_, value_b = self.serde.dumps_typed(value)
+            blob = ormsgpack.packb((task_id, channel, type_, value_b, task_path))
+            if old := task_writes.get(inner_key):
+                self._resize(entry, -len(old))
+            task_writes[inner_key] = blob
+            self._resize(entry, len(blob))
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete all checkpoints and writes of a thread."""
+        self._drop(thread_id)
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return self.get_tuple(config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        return self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return self.delete_thread(thread_id)
+
+
+def build_checkpointer() -> BaseCheckpointSaver:
+    """Create the checkpoint saver selected by ``CHECKPOINTER_BACKEND``."""
+    if settings.CHECKPOINTER_BACKEND == "memory":
+        return BoundedMemorySaver()
+    return PostgresCheckpointSaver()
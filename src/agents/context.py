@@ -0,0 +1,51 @@
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.database import USE_PRIMARY
+
+
+@dataclass
+class AgentContext:
+    """Per-request runtime context injected into the shared agent graph.
+
+    Tools open a session per call with ``session()``, so a pooled connection
+    is held while a tool runs rather than for the whole LLM stream. Once a
+    tool has written, later tool calls of the turn read from the primary.
+    """
+
+    session_factory: async_sessionmaker[AsyncSession]
+    user_id: int
+    # Set by UnitOfWorkMiddleware: one session for every tool call of the turn
+    turn_session: Optional[AsyncSession] = None
+    # Parallel tool calls take turns on turn_session, which runs one operation at a time
+    turn_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    use_primary: bool = False
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[AsyncSession]:
+        if self.turn_session is not None:
+            async with self.turn_lock:
+                yield self.turn_session
+            return
+        async with self.session_factory() as session:
+            if self.use_primary:
+                session.info[USE_PRIMARY] = True
+            try:
+                yield session
+            finally:
+                self.use_primary = session.info.get(USE_PRIMARY, False)
+
+    async def close(self):
+        """End the turn: release the session of a turn that did not finish.
+
+        Shielded, so the connection goes back to the pool even when the caller
+        is being cancelled, e.g. by a client disconnect.
+        """
+        self.use_primary = False
+        if self.turn_session is not None:
+            session, self.turn_session = self.turn_session, None
+            await asyncio.shield(session.close())
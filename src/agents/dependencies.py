@@ -1,13 +1,15 @@
 from fastapi import Depends
-from sqlalchemy.ext.asyncio.session import AsyncSession
 
 from src.database import Database
 from src.agents.agent import Agent
 
 
 def get_agent(
-    session: AsyncSession = Depends(Database.get_async_session),
     user: dict = Depends(lambda: {"id": 1, "name": "John Kristan"}),
 ):
-    """FastAPI dependency that provides an Agent instance."""
-    return Agent(session, user["id"])
+    """FastAPI dependency that provides an Agent instance.
+
+    The agent gets the session factory rather than a session: tools check out
+    a connection per call instead of holding one for the whole stream.
+    """
+    return Agent(Database.session_factory(), user["id"])
@@ -0,0 +1,160 @@
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+from typing import AsyncIterator, Optional
+
+from langchain_core.messages import AIMessage, HumanMessage
+from pydantic import ValidationError
+
+from src.agents.context import AgentContext
+from src.agents.streaming import (
+    DONE,
+    TOKEN,
+    TOOL_END,
+    TOOL_START,
+    USAGE,
+    ChatEvent,
+    chat_events,
+    turn_state,
+)
+from src.budgets.repositories import BudgetRepository
+from src.categories.repositories import CategoryRepository
+from src.config import settings
+from src.expenses.parser import parse_expense
+from src.expenses.repositories import ExpenseRepository
+from src.expenses.schemas import ExpenseIn
+
+MATCH_CANDIDATES = 3
+
+
+@dataclass
+class FastPathStats:
+    attempts: int = 0
+    hits: int = 0  # expenses created without the agent
+    misses: Counter = field(default_factory=Counter)  # fallbacks to the agent, by reason
+
+    def miss(self, reason: str):
+        self.misses[reason] += 1
+
+    def to_dict(self) -> dict:
+        return {
+            "attempts": self.attempts,
+            "hits": self.hits,
+            "misses": dict(self.misses),
+            "hit_rate": self.hits / self.attempts if self.attempts else 0.0,
+        }
+
+
+fast_path_stats = FastPathStats()
+
+
+def pick_match(name: str, matches: list[tuple]):
+    """The row ``name`` clearly refers to: an exact name, or the only close match."""
+    for row, _ in matches:
+        if row.name.lower() == name.lower():
+            return row
+    if len(matches) == 1 and matches[0][1] >= settings.CHAT_FAST_PATH_MIN_SCORE:
+        return matches[0][0]
+    return None
+
+
+def confirmation(expense, category, budget) -> str:
+    spent_on = expense.date_spent.date() if expense.date_spent else date.today()
+    return (
+        f"Added {expense.description} for {float(expense.amount):,.2f} "
+        f"to {category.name} from the {budget.name} budget on {spent_on.isoformat()}."
+    )
+
+
+async def fast_path_events(
+    graph, message: str, config: dict, context: AgentContext
+) -> Optional[AsyncIterator[ChatEvent]]:
+    """Create a one-line expense without the agent, or return ``None`` to use it.
+
+    The message must parse as one expense and name a category and a budget
+    that resolve to exactly one of the user's rows. The turn is recorded in
+    the thread's history, so the agent sees it on the next message.
+    """
+    fast_path_stats.attempts += 1
+    parsed = parse_expense(message, date.today())
+    if parsed is None:
+        fast_path_stats.miss("unparsed")
+        return None
+    if not parsed.category or not parsed.budget:
+        fast_path_stats.miss("incomplete")
+        return None
+
+    async with context.session() as session:
+        category = pick_match(
+            parsed.category,
+            await CategoryRepository(session).search_categories(
+                parsed.category, context.user_id, limit=MATCH_CANDIDATES
+            ),
+        )
+        if category is None:
+            fast_path_stats.miss("category")
+            return None
+        budget = pick_match(
+            parsed.budget,
+            await BudgetRepository(session).search_budgets(
+                parsed.budget, context.user_id, limit=MATCH_CANDIDATES
+            ),
+        )
+        if budget is None:
+            fast_path_stats.miss("budget")
+            return None
+
+        try:
+            expense_data = ExpenseIn(
+                description=parsed.description,
+                amount=parsed.amount,
+                spending_type=parsed.spending_type,
+                date_spent=(
+                    datetime.combine(parsed.date_spent, time())
+                    if parsed.date_spent
+                    else datetime.now()
+                ),
+                category_id=category.id,
+                budget_id=budget.id,
+                user_id=context.user_id,
+            )
+        except ValidationError:
+            fast_path_stats.miss("invalid")
+            return None
+
+        expense = await ExpenseRepository(session).create_expense(expense_data)
+
+    fast_path_stats.hits += 1
+    reply = confirmation(expense, category, budget)
+    await graph.aupdate_state(
+        config, {"messages": [HumanMessage(content=message), AIMessage(content=reply)]}
+    )
+
+    async def events():
+        run_id = str(uuid.uuid4())
+        yield TOOL_START, {
+            "tool": "create_expense",
+            "run_id": run_id,
+            "input": expense_data.model_dump(mode="json"),
+        }
+        yield TOOL_END, {"tool": "create_expense", "run_id": run_id}
+        yield TOKEN, {"text": reply}
+        yield USAGE, {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+        yield DONE, {"fast_path": True}
+
+    return events()
+
+
+async def turn_events(
+    graph, message: str, config: dict, context: AgentContext
+) -> AsyncIterator[ChatEvent]:
+    """Run one chat turn: the fast path when it applies, else the agent."""
+    if settings.CHAT_FAST_PATH:
+        events = await fast_path_events(graph, message, config, context)
+        if events is not None:
+            async for event in events:
+                yield event
+            return
+    async for event in chat_events(graph, turn_state(message), config, context):
+        yield event
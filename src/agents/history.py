@@ -0,0 +1,123 @@
+import json
+from functools import lru_cache
+from typing import TYPE_CHECKING, NotRequired
+
+from langchain.agents.middleware import AgentMiddleware, AgentState
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AnyMessage,
+    HumanMessage,
+    RemoveMessage,
+    SystemMessage,
+)
+
+from src.config import settings
+
+if TYPE_CHECKING:
+    import tiktoken
+
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and an expense tracking assistant.
+Update the summary with the new messages below. Keep amounts, dates, category and budget names and IDs,
+records that were created, and any open questions. Drop greetings and small talk. Reply with the summary only."""
+
+
+@lru_cache
+def get_encoding(model: str) -> "tiktoken.Encoding":
+    import tiktoken
+
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(messages: list[AnyMessage], model: str) -> int:
+    """Approximate the prompt tokens of ``messages`` for ``model``."""
+    encoding = get_encoding(model)
+    total = 0
+    for message in messages:
+        total += 4 + len(encoding.encode(message.text))
+        if isinstance(message, AIMessage) and message.tool_calls:
+            total += len(encoding.encode(json.dumps([c["args"] for c in message.tool_calls])))
+    return total
+
+
+def render_messages(messages: list[AnyMessage]) -> str:
+    lines = []
+    for message in messages:
+        if isinstance(message, AIMessage) and message.tool_calls:
+            calls = ", ".join(f"{c['name']}({json.dumps(c['args'])})" for c in message.tool_calls)
+            lines.append(f"assistant called: {calls}")
+        if message.text:
+            lines.append(f"{message.type}: {message.text}")
+    return "\n".join(lines)
+
+
+class HistoryState(AgentState):
+    history_summary: NotRequired[str]
+
+
+class HistoryMiddleware(AgentMiddleware[HistoryState]):
+    """Keeps the prompt under the model's token budget.
+
+    The last ``keep_turns`` user turns stay verbatim. Once the history goes
+    over budget, older turns are removed from state and folded into
+    ``history_summary``, which is extended on each later fold and sent to
+    the model as part of the system prompt.
+    """
+
+    state_schema = HistoryState
+
+    def __init__(
+        self,
+        summary_model: BaseChatModel,
+        model_name: str = settings.AGENT_MODEL,
+        keep_turns: int = settings.HISTORY_KEEP_TURNS,
+    ):
+        super().__init__()
+        self.summary_model = summary_model
+        self.model_name = model_name
+        self.keep_turns = keep_turns
+        self.token_budget = settings.HISTORY_TOKEN_BUDGETS.get(
+            model_name, settings.HISTORY_DEFAULT_TOKEN_BUDGET
+        )
+
+    def _cutoff(self, messages: list[AnyMessage]) -> int:
+        """Index of the first message of the oldest turn to keep, 0 if all are kept."""
+        turn_starts = [i for i, m in enumerate(messages) if isinstance(m, HumanMessage)]
+        if len(turn_starts) <= self.keep_turns:
+            return 0
+        return turn_starts[-self.keep_turns]
+
+    async def abefore_model(self, state: HistoryState, runtime) -> dict | None:
+        messages = state["messages"]
+        summary = state.get("history_summary", "")
+        if count_tokens(messages, self.model_name) <= self.token_budget:
+            return None
+
+        cutoff = self._cutoff(messages)
+        if not cutoff:
+            return None
+
+        older = messages[:cutoff]
+        response = await self.summary_model.ainvoke(
+            [
+                SystemMessage(content=SUMMARY_PROMPT),
+                HumanMessage(
+                    content=f"Current summary:\n{summary or '(empty)'}\n\nNew messages:\n{render_messages(older)}"
+                ),
+            ]
+        )
+        return {
+            "messages": [RemoveMessage(id=m.id) for m in older],
+            "history_summary": response.text.strip(),
+        }
+
+    async def awrap_model_call(self, request, handler):
+        if summary := request.state.get("history_summary"):
+            request = request.override(
+                system_prompt=f"{request.system_prompt}\n\n## Conversation summary so far:\n{summary}"
+            )
+        return await handler(request)
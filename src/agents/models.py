@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary
+from datetime import datetime
+from src.database import Base
+
+
+class AgentCheckpoint(Base):
+    __tablename__ = "agent_checkpoints"
+
+    thread_id = Column(String(255), primary_key=True)
+    checkpoint_ns = Column(String(255), primary_key=True, default="")
+    checkpoint_id = Column(String(64), primary_key=True)
+    parent_checkpoint_id = Column(String(64), nullable=True)
+    type = Column(String(64), nullable=True)
+    checkpoint = Column(LargeBinary, nullable=False)
+    checkpoint_metadata = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.now)
+
+
+class AgentCheckpointWrite(Base):
+    __tablename__ = "agent_checkpoint_writes"
+
+    thread_id = Column(String(255), primary_key=True)
+    checkpoint_ns = Column(String(255), primary_key=True, default="")
+    checkpoint_id = Column(String(64), primary_key=True)
+    task_id = Column(String(64), primary_key=True)
+    idx = Column(Integer, primary_key=True)
+    channel = Column(String(255), nullable=False)
+    type = Column(String(64), nullable=True)
+    value = Column(LargeBinary, nullable=True)
+    task_path = Column(String(255), nullable=False, default="")
@@ -0,0 +1,55 @@
+from langchain.agents.middleware import AgentMiddleware
+
+from src.budgets.repositories import BudgetRepository
+from src.categories.repositories import CategoryRepository
+
+
+def render_user_context(categories_context: dict, budget_context: dict) -> str:
+    """Render the preloaded lookups as a compact system prompt section."""
+    categories = "; ".join(f"{name}={id}" for name, id in categories_context.items())
+    budgets = "; ".join(
+        f"{name}={budget['id']} ({budget['period']})"
+        for name, budget in budget_context.items()
+    )
+    return (
+        "## Known categories (name=category_id)\n"
+        f"{categories or 'none'}\n\n"
+        "## Known budgets (name=budget_id (period))\n"
+        f"{budgets or 'none'}"
+    )
+
+
+class PreloadContextMiddleware(AgentMiddleware):
+    """Loads the user's categories and budgets into state once per thread.
+
+    The model resolves names from the rendered lists instead of calling
+    get_category_id / get_budget_id. create_category and create_budget add
+    their new rows to the state themselves, so there is no reload per turn.
+    """
+
+    async def abefore_agent(self, state, runtime) -> dict | None:
+        if state.get("context_loaded"):
+            return None
+
+        user_id = runtime.context.user_id
+        async with runtime.context.session() as session:
+            categories = await CategoryRepository(session).list_categories(user_id)
+            budgets = await BudgetRepository(session).list_budgets(user_id)
+        return {
+            "context_loaded": True,
+            "categories_context": {c.name: c.id for c in categories},
+            "budget_context": {
+                b.name: {"id": b.id, "period": b.budget_period.isoformat()}
+                for b in budgets
+            },
+        }
+
+    async def awrap_model_call(self, request, handler):
+        user_context = render_user_context(
+            request.state.get("categories_context") or {},
+            request.state.get("budget_context") or {},
+        )
+        request = request.override(
+            system_prompt=f"{request.system_prompt}\n\n{user_context}"
+        )
+        return await handler(request)
@@ -1,13 +1,24 @@
-import json
 import logging
-from collections import defaultdict
-from fastapi import APIRouter, Depends, Request
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Request, WebSocket
 from fastapi.responses import StreamingResponse
-from langchain_core.messages import AIMessageChunk, HumanMessage
 
+from src.config import settings
 from src.agents.dependencies import get_agent
 from src.agents.schemas import AgentChatIn
 from src.agents.agent import Agent
+from src.agents.checkpointer import BoundedMemorySaver
+from src.agents.streaming import (
+    cancel_on_disconnect,
+    coalesce_tokens,
+    sse_stream,
+    stream_stats,
+    text_stream,
+)
+from src.agents.fast_path import fast_path_stats, turn_events
+from src.agents.websocket import ChatConnection, socket_stats
+from src.cache import lookup_cache
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -20,60 +31,72 @@ agent_router = APIRouter()
 @agent_router.post("/chat", status_code=201)
 async def agent_chat(
     payload: AgentChatIn,
+    request: Request,
+    format: Optional[Literal["text", "sse"]] = None,
     agent: Agent = Depends(get_agent),
 ):
+    """Stream the agent's reply.
+
+    ``text`` (the default) streams the reply text and ends with ``[END]``;
+    ``sse``, also chosen by ``Accept: text/event-stream``, streams typed
+    events: token, tool_start, tool_end, tool_error, usage and done.
+    """
     loaded_agent = agent.load_agent()
-    MAX_TOOL_DEPTH = 10
-
-    async def stream():
-        tool_stack = []
-        tool_counter = {}
-
-        initial_state = {
-            "messages": [HumanMessage(content=payload.message)],
-            "expense_extraction": {},
-            "pending_fields": ["description", "amount", "category_id", "budget_id"],
-            "current_step": "gathering_expense",
-            "budget_context": {},
-            "categories_context": {},
-            "extracted_budget_id": None,
-            "extracted_category_id": None,
+    if format is None:
+        accept = request.headers.get("accept", "")
+        format = "sse" if "text/event-stream" in accept else "text"
+
+    async def events():
+        try:
+            async for event in turn_events(
+                loaded_agent, payload.message, agent.config, agent.context
+            ):
+                yield event
+        finally:
+            await agent.context.close()
+
+    frames = coalesce_tokens(
+        events(), settings.CHAT_STREAM_FRAME_BYTES, settings.CHAT_STREAM_FRAME_WINDOW
+    )
+    if format == "sse":
+        body = sse_stream(frames)
+        response_args = {
+            "media_type": "text/event-stream",
+            "headers": {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
         }
-        config = {"configurable": {"thread_id": f"user_{agent.user_id}_session"}}
-
-        async for event in loaded_agent.astream_events(
-            initial_state, config, version="v2"
-        ):
-            if event["event"] == "on_tool_start":
-                tool = event["name"]
-                tool_stack.append(tool)
-                tool_counter[tool] = tool_counter.get(tool, 0) + 1
-
-                # Prevent deep recursion or excessive repeated tool invocations
-                if tool_counter[tool] > MAX_TOOL_DEPTH:
-                    yield f"\n❌ TOOL RECURSION ERROR: Tool '{tool}' called too many times, possible infinite loop detected.\n"
-                    break
-
-            if event["event"] == "on_tool_end":
-                tool = event["name"]
-                if tool_stack and tool_stack[-1] == tool:
-                    tool_stack.pop()
-                else:
-                    if tool in tool_stack:
-                        tool_stack.remove(tool)
-
-            if event["event"] == "on_tool_error":
-                tool = event["name"]
-                error = event["data"]["error"]
-                print("\n❌ TOOL ERROR")
-                print(f"Tool: {tool}")
-                print(f"Error: {error}\n")
-
-            if event["event"] == "on_chat_model_stream":
-                chunk = event["data"]["chunk"].content
-                if chunk:
-                    yield chunk
-
-        yield "[END]"
-
-    return StreamingResponse(stream(), media_type="text/plain")
+    else:
+        body = text_stream(frames)
+        response_args = {"media_type": "text/plain"}
+
+    # A closed tab stops the agent run instead of paying for the rest of it
+    return StreamingResponse(
+        cancel_on_disconnect(request, body, settings.CHAT_DISCONNECT_POLL_INTERVAL),
+        **response_args,
+    )
+
+
+@agent_router.websocket("/ws")
+async def agent_ws(websocket: WebSocket, agent: Agent = Depends(get_agent)):
+    """Chat over one WebSocket; see ``ChatConnection`` for the protocol."""
+    await ChatConnection(websocket, agent).run()
+
+
+@agent_router.get("/chat/stats")
+async def chat_stats():
+    return {
+        **stream_stats.to_dict(),
+        "websockets": socket_stats.to_dict(),
+        "fast_path": fast_path_stats.to_dict(),
+    }
+
+
+@agent_router.get("/checkpointer/stats")
+async def checkpointer_stats():
+    if not isinstance(Agent.checkpointer, BoundedMemorySaver):
+        return {"backend": type(Agent.checkpointer).__name__}
+    return {"backend": "memory", **Agent.checkpointer.stats()}
+
+
+@agent_router.get("/cache/stats")
+async def cache_stats():
+    return lookup_cache.stats()
@@ -0,0 +1,266 @@
+import asyncio
+import json
+import logging
+import time
+from contextlib import aclosing, suppress
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, TypeVar
+
+from langchain_core.messages import HumanMessage
+from langchain_core.messages.ai import UsageMetadata, add_usage
+from starlette.requests import Request
+
+logger = logging.getLogger(__name__)
+
+# Chat stream event types
+TOKEN = "token"
+TOOL_START = "tool_start"
+TOOL_END = "tool_end"
+TOOL_ERROR = "tool_error"
+USAGE = "usage"
+DONE = "done"
+
+MAX_TOOL_DEPTH = 10
+COALESCE_QUEUE_SIZE = 256  # events read ahead of the frames being written
+
+ChatEvent = tuple[str, dict[str, Any]]
+T = TypeVar("T")
+
+
+@dataclass
+class StreamStats:
+    started: int = 0
+    completed: int = 0
+    cancelled: int = 0  # client went away before the turn finished
+    failed: int = 0
+
+    def finish(self, outcome: str):
+        """Count a stream as ``completed``, ``cancelled`` or ``failed``."""
+        setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def to_dict(self) -> dict:
+        finished = self.completed + self.cancelled + self.failed
+        return {**asdict(self), "in_flight": self.started - finished}
+
+
+stream_stats = StreamStats()
+
+
+def turn_state(message: str) -> dict:
+    """Graph input for one chat turn."""
+    return {
+        "messages": [HumanMessage(content=message)],
+        "expense_extraction": {},
+        "pending_fields": ["description", "amount", "category_id", "budget_id"],
+        "current_step": "gathering_expense",
+        "extracted_budget_id": None,
+        "extracted_category_id": None,
+    }
+
+
+async def chat_events(graph, state: dict, config: dict, context) -> AsyncIterator[ChatEvent]:
+    """Run one agent turn and yield its typed events, ending with usage and done."""
+    tool_counter = {}
+    usage = UsageMetadata(input_tokens=0, output_tokens=0, total_tokens=0)
+
+    async for event in graph.astream_events(state, config, context=context, version="v2"):
+        kind = event["event"]
+
+        if kind == "on_chat_model_stream":
+            text = event["data"]["chunk"].content
+            if text:
+                yield TOKEN, {"text": text}
+
+        elif kind == "on_chat_model_end":
+            # Every model call of the turn, including history summaries
+            usage = add_usage(usage, getattr(event["data"]["output"], "usage_metadata", None))
+
+        elif kind == "on_tool_start":
+            tool = event["name"]
+            tool_counter[tool] = tool_counter.get(tool, 0) + 1
+
+            # Prevent deep recursion or excessive repeated tool invocations
+            if tool_counter[tool] > MAX_TOOL_DEPTH:
+                yield TOOL_ERROR, {
+                    "tool": tool,
+                    "error": f"Tool '{tool}' called too many times, possible infinite loop detected.",
+                    "aborted": True,
+                }
+                break
+            yield TOOL_START, {
+                "tool": tool,
+                "run_id": event["run_id"],
+                "input": event["data"].get("input"),
+            }
+
+        elif kind == "on_tool_end":
+            yield TOOL_END, {"tool": event["name"], "run_id": event["run_id"]}
+
+        elif kind == "on_tool_error":
+            error = event["data"]["error"]
+            logger.error("Tool %s failed: %s", event["name"], error)
+            yield TOOL_ERROR, {
+                "tool": event["name"],
+                "run_id": event["run_id"],
+                "error": str(error),
+                "aborted": False,
+            }
+
+    yield USAGE, dict(usage)
+    yield DONE, {}
+
+
+class TokenBuffer:
+    """Token text waiting to go out as one frame."""
+
+    def __init__(self):
+        self.parts: list[str] = []
+        self.size = 0
+        self.started = 0.0
+
+    def __bool__(self) -> bool:
+        return bool(self.parts)
+
+    def add(self, text: str):
+        if not self.parts:
+            self.started = time.monotonic()
+        self.parts.append(text)
+        self.size += len(text.encode())
+
+    def remaining(self, window: float) -> float:
+        return max(self.started + window - time.monotonic(), 0.0)
+
+    def flush(self) -> ChatEvent:
+        text = "".join(self.parts)
+        self.parts, self.size = [], 0
+        return TOKEN, {"text": text}
+
+
+async def coalesce_tokens(
+    events: AsyncIterator[ChatEvent], max_bytes: int, window: float
+) -> AsyncIterator[ChatEvent]:
+    """Merge consecutive token events into frames.
+
+    A frame goes out once it holds ``max_bytes``, ``window`` seconds after its
+    first token, or before any other event, so tokens never overtake tool
+    events. Other events pass through unchanged. ``events`` is read by a
+    separate task, so a frame can go out on time while the next token is
+    still being generated.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=COALESCE_QUEUE_SIZE)
+
+    async def read():
+        try:
+            async with aclosing(events):
+                async for item in events:
+                    await queue.put(item)
+            await queue.put(None)
+        except Exception as e:
+            await queue.put(e)
+
+    reader = asyncio.create_task(read())
+    buffer = TokenBuffer()
+    try:
+        while True:
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                if not buffer:
+                    item = await queue.get()
+                else:
+                    try:
+                        item = await asyncio.wait_for(queue.get(), buffer.remaining(window))
+                    except TimeoutError:
+                        yield buffer.flush()
+                        continue
+
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                if buffer:
+                    yield buffer.flush()
+                raise item
+
+            event, data = item
+            if event == TOKEN:
+                buffer.add(data["text"])
+                if buffer.size >= max_bytes or not buffer.remaining(window):
+                    yield buffer.flush()
+                continue
+            if buffer:
+                yield buffer.flush()
+            yield event, data
+
+        if buffer:
+            yield buffer.flush()
+    finally:
+        reader.cancel()
+        with suppress(asyncio.CancelledError):
+            await reader
+
+
+async def cancel_on_disconnect(
+    request: Request, stream: AsyncIterator[T], interval: float
+) -> AsyncIterator[T]:
+    """Pass ``stream`` through until the client disconnects, then cancel it.
+
+    Cancelling propagates into the agent run: the graph's tasks, the model's
+    HTTP request and open tool sessions, whose transactions roll back.
+    Outcomes are counted in ``stream_stats``.
+    """
+
+    async def watch():
+        while not await request.is_disconnected():
+            await asyncio.sleep(interval)
+
+    stream_stats.started += 1
+    outcome = "cancelled"
+    watcher = asyncio.create_task(watch())
+    iterator = aiter(stream)
+    step = None
+    try:
+        while True:
+            step = asyncio.ensure_future(anext(iterator))
+            await asyncio.wait({step, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            if not step.done():
+                logger.info("Client disconnected, chat stream cancelled")
+                break
+            try:
+                item = step.result()
+            except StopAsyncIteration:
+                outcome = "completed"
+                break
+            step = None
+            yield item
+    except Exception:
+        outcome = "failed"
+        raise
+    finally:
+        # Anything else, e.g. the server cancelling the response, counts as cancelled
+        stream_stats.finish(outcome)
+        watcher.cancel()
+        if step is not None and not step.done():
+            step.cancel()
+            with suppress(asyncio.CancelledError, StopAsyncIteration):
+                await step
+        if aclose := getattr(iterator, "aclose", None):
+            await aclose()
+
+
+def sse_frame(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def sse_stream(events: AsyncIterator[ChatEvent]) -> AsyncIterator[str]:
+    async for event, data in events:
+        yield sse_frame(event, data)
+
+
+async def text_stream(events: AsyncIterator[ChatEvent]) -> AsyncIterator[str]:
+    """The plain text stream: token text, recursion errors, then ``[END]``."""
+    async for event, data in events:
+        if event == TOKEN:
+            yield data["text"]
+        elif event == TOOL_ERROR and data["aborted"]:
+            yield f"\n❌ TOOL RECURSION ERROR: {data['error']}\n"
+    yield "[END]"
@@ -0,0 +1,79 @@
+from datetime import date
+from typing import NotRequired
+
+from langchain.agents.middleware import AgentMiddleware, AgentState
+from langchain_core.messages import HumanMessage
+
+from src.categories.repositories import CategoryTermRepository
+from src.config import settings
+from src.expenses.parser import AMOUNT, parse_expense
+
+
+class SuggestionState(AgentState):
+    category_suggestion: NotRequired[dict | None]
+
+
+def render_suggestion(suggestion: dict) -> str:
+    return (
+        "## Suggested category (from the user's past expenses)\n"
+        f"\"{suggestion['description']}\": {suggestion['name']}={suggestion['category_id']}"
+        f" (confidence {suggestion['confidence']})"
+    )
+
+
+class CategorySuggestionMiddleware(AgentMiddleware[SuggestionState]):
+    """Suggests a category for an expense the user did not give one.
+
+    The user's category classifier runs once per turn, in process, so the
+    model gets a likely category_id without a get_category_id call or a
+    question. Confident suggestions go into ``category_suggestion`` and
+    ``extracted_category_id`` and are rendered into the system prompt.
+    Runs after PreloadContextMiddleware, whose categories it checks against.
+    """
+
+    state_schema = SuggestionState
+
+    async def abefore_agent(self, state, runtime) -> dict | None:
+        suggestion = await self.suggest(state, runtime)
+        return {
+            "category_suggestion": suggestion,
+            "extracted_category_id": suggestion["category_id"] if suggestion else None,
+        }
+
+    async def suggest(self, state, runtime) -> dict | None:
+        messages = state["messages"]
+        if not messages or not isinstance(messages[-1], HumanMessage):
+            return None
+        text = messages[-1].text
+        # Only messages with an amount can be adding an expense
+        if not AMOUNT.search(text):
+            return None
+        parsed = parse_expense(text, date.today())
+        if parsed is not None and parsed.category:
+            return None
+        description = parsed.description if parsed else text
+
+        async with runtime.context.session() as session:
+            matches = await CategoryTermRepository(session).suggest_categories(
+                description, runtime.context.user_id, limit=1
+            )
+        if not matches:
+            return None
+        category_id, confidence = matches[0]
+        names = {id: name for name, id in (state.get("categories_context") or {}).items()}
+        if confidence < settings.CATEGORY_SUGGESTION_MIN_CONFIDENCE or category_id not in names:
+            return None
+        return {
+            "category_id": category_id,
+            "name": names[category_id],
+            "description": description,
+            "confidence": round(confidence, 2),
+        }
+
+    async def awrap_model_call(self, request, handler):
+        suggestion = request.state.get("category_suggestion")
+        if suggestion:
+            request = request.override(
+                system_prompt=f"{request.system_prompt}\n\n{render_suggestion(suggestion)}"
+            )
+        return await handler(request)
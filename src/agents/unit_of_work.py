@@ -0,0 +1,27 @@
+from langchain.agents.middleware import AgentMiddleware
+
+from src.repositories import UNIT_OF_WORK, commit_unit_of_work
+
+
+class UnitOfWorkMiddleware(AgentMiddleware):
+    """Commits every repository write of an agent turn at once, when the turn ends.
+
+    The tool calls of the turn share one session, which holds its connection
+    until the turn ends. A turn that fails part way commits nothing; its
+    session is closed by ``AgentContext.close`` and the writes roll back.
+    """
+
+    async def abefore_agent(self, state, runtime) -> dict | None:
+        session = runtime.context.session_factory()
+        session.info[UNIT_OF_WORK] = True
+        runtime.context.turn_session = session
+        return None
+
+    async def aafter_agent(self, state, runtime) -> dict | None:
+        session = runtime.context.turn_session
+        session.info.pop(UNIT_OF_WORK, None)
+        try:
+            await commit_unit_of_work(session)
+        finally:
+            await runtime.context.close()
+        return None
@@ -0,0 +1,192 @@
+import asyncio
+import json
+import logging
+import time
+from contextlib import suppress
+from dataclasses import asdict, dataclass
+
+from fastapi import WebSocket, WebSocketDisconnect
+from starlette.websockets import WebSocketState
+from pydantic import ValidationError
+
+from src.agents.agent import Agent
+from src.agents.schemas import AgentChatIn
+from src.agents.fast_path import turn_events
+from src.agents.streaming import DONE, coalesce_tokens, stream_stats
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SocketStats:
+    open: int = 0
+    idle_closed: int = 0
+    slow_closed: int = 0  # dropped for not reading frames
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+socket_stats = SocketStats()
+
+
+class SlowConsumer(Exception):
+    pass
+
+
+class ChatConnection:
+    """One chat WebSocket and the agent session it keeps for its lifetime.
+
+    The agent, its compiled graph and thread config are set up once per
+    connection instead of per message; the preloaded categories and budgets
+    stay in the thread's state between turns.
+
+    Client messages are JSON objects with a ``type``:
+
+    - ``message``: ``{"type": "message", "message": "..."}`` starts a turn
+    - ``cancel``: cancels the running turn
+    - ``ping``: answered with a ``pong`` event
+
+    The server sends ``{"event": ..., "data": {...}}`` frames: the typed chat
+    events of ``src.agents.streaming``, plus ``heartbeat``, ``pong`` and
+    ``error``. One turn runs at a time. Frames are pulled from the turn only as
+    fast as the socket accepts them, and a client that does not read a frame
+    within ``CHAT_WS_SEND_TIMEOUT`` is disconnected.
+    """
+
+    def __init__(self, websocket: WebSocket, agent: Agent):
+        self.websocket = websocket
+        self.agent = agent
+        self.graph = agent.load_agent()
+        self.turn: asyncio.Task | None = None
+        self.send_lock = asyncio.Lock()
+        self.closed = False  # closed by the server; nothing more is read or sent
+        self.last_sent = self.last_active = time.monotonic()
+
+    async def run(self):
+        await self.websocket.accept()
+        socket_stats.open += 1
+        try:
+            await self.receive_loop()
+        except WebSocketDisconnect:
+            pass
+        except SlowConsumer:
+            await self.close_slow()
+        finally:
+            socket_stats.open -= 1
+            await self.cancel_turn()
+
+    async def receive_loop(self):
+        while not self.closed:
+            try:
+                message = await asyncio.wait_for(
+                    self.websocket.receive_text(), settings.CHAT_WS_HEARTBEAT_INTERVAL
+                )
+            except TimeoutError:
+                # The turn may have dropped a slow client meanwhile
+                if self.closed:
+                    return
+                if self.turn is None and self.idle_for() > settings.CHAT_WS_IDLE_TIMEOUT:
+                    socket_stats.idle_closed += 1
+                    await self.websocket.close(code=1000, reason="idle")
+                    return
+                if time.monotonic() - self.last_sent >= settings.CHAT_WS_HEARTBEAT_INTERVAL:
+                    await self.send("heartbeat")
+                continue
+
+            if self.closed:
+                return
+            self.last_active = time.monotonic()
+            await self.handle(message)
+
+    def idle_for(self) -> float:
+        return time.monotonic() - self.last_active
+
+    async def handle(self, raw: str):
+        try:
+            message = json.loads(raw)
+            kind = message.get("type")
+        except (ValueError, AttributeError):
+            await self.send("error", {"error": "Messages must be JSON objects"})
+            return
+
+        if kind == "ping":
+            await self.send("pong")
+        elif kind == "cancel":
+            await self.cancel_turn()
+        elif kind == "message":
+            if self.turn is not None:
+                await self.send("error", {"error": "A turn is already running"})
+                return
+            try:
+                payload = AgentChatIn.model_validate(message)
+            except ValidationError as e:
+                await self.send("error", {"error": str(e)})
+                return
+            self.turn = asyncio.create_task(self.run_turn(payload.message))
+        else:
+            await self.send("error", {"error": f"Unknown message type: {kind!r}"})
+
+    async def run_turn(self, message: str):
+        stream_stats.started += 1
+        outcome = "cancelled"
+        frames = coalesce_tokens(
+            turn_events(self.graph, message, self.agent.config, self.agent.context),
+            settings.CHAT_STREAM_FRAME_BYTES,
+            settings.CHAT_STREAM_FRAME_WINDOW,
+        )
+        try:
+            async for event, data in frames:
+                await self.send(event, data)
+            outcome = "completed"
+        except SlowConsumer:
+            await self.close_slow()
+        except Exception:
+            outcome = "failed"
+            logger.exception("Chat turn failed")
+            with suppress(Exception):
+                await self.send("error", {"error": "The turn failed"})
+        finally:
+            stream_stats.finish(outcome)
+            await frames.aclose()
+            await self.agent.context.close()
+            self.turn = None
+            self.last_active = time.monotonic()
+
+    async def cancel_turn(self):
+        turn = self.turn
+        if turn is None:
+            return
+        turn.cancel()
+        with suppress(asyncio.CancelledError):
+            await turn
+        if self.connected:
+            await self.send(DONE, {"cancelled": True})
+
+    @property
+    def connected(self) -> bool:
+        return (
+            self.websocket.client_state == WebSocketState.CONNECTED
+            and self.websocket.application_state == WebSocketState.CONNECTED
+        )
+
+    async def close_slow(self):
+        if self.closed:
+            return
+        self.closed = True
+        socket_stats.slow_closed += 1
+        logger.warning("Closing chat WebSocket of user %s: frames not read", self.agent.user_id)
+        if self.connected:
+            await self.websocket.close(code=1013, reason="slow consumer")
+
+    async def send(self, event: str, data: dict | None = None):
+        frame = json.dumps({"event": event, "data": data or {}}, default=str)
+        async with self.send_lock:
+            try:
+                await asyncio.wait_for(
+                    self.websocket.send_text(frame), settings.CHAT_WS_SEND_TIMEOUT
+                )
+            except TimeoutError:
+                raise SlowConsumer() from None
+        self.last_sent = time.monotonic()
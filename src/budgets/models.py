@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Index
 from datetime import datetime
 from src.database import Base
 from sqlalchemy import ForeignKey
@@ -7,6 +7,16 @@ from sqlalchemy.orm import relationship
 
 class Budget(Base):
     __tablename__ = "budgets"
+    __table_args__ = (
+        Index(
+            "ix_budgets_user_id_name_trgm",
+            "user_id",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        Index("ix_budgets_user_id_budget_period", "user_id", "budget_period"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
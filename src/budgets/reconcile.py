@@ -0,0 +1,39 @@
+"""Recompute budget balances that drifted from their expenses.
+
+``current_amount`` is maintained incrementally by every expense write; this
+corrects budgets where it no longer matches the sum of their expenses, e.g.
+after manual SQL or a write path that bypassed the repositories. Run it from
+cron or by hand:
+
+    python -m src.budgets.reconcile [--user-id 1]
+"""
+
+import logging
+from typing import Optional
+
+# Register the mappers Budget's relationships refer to
+import src.categories.models  # noqa: F401
+from src.budgets.repositories import BudgetRepository
+from src.maintenance import run_cli, run_in_session
+
+logger = logging.getLogger(__name__)
+
+
+async def reconcile(user_id: Optional[int] = None) -> list[dict]:
+    corrected = await run_in_session(
+        lambda session: BudgetRepository(session).reconcile_balances(user_id)
+    )
+
+    for budget in corrected:
+        logger.warning(
+            "Budget %s drifted: recorded %.2f, expenses sum to %.2f",
+            budget["budget_id"],
+            budget["recorded"],
+            budget["actual"],
+        )
+    logger.info("Reconciled budgets, %d corrected", len(corrected))
+    return corrected
+
+
+if __name__ == "__main__":
+    run_cli(__doc__, reconcile, "only this user's budgets")
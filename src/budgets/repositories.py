@@ -1,26 +1,35 @@
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from collections import defaultdict
+from typing import Iterable, Optional
+
+from sqlalchemy import bindparam, func, select, update
 
 from src.budgets.schemas import BudgetIn
 from src.budgets.models import Budget
+from src.cache import lookup_cache
+from src.expenses.models import Expense
+from src.fuzzy import search_by_name
+from src.repositories import BaseRepository
 
 
-class BudgetRepository:
-    def __init__(self, session: AsyncSession):
-        self.session = session
+class BudgetRepository(BaseRepository):
+    model = Budget
 
-    async def get_budget_by_name(self, budget_name: str, user_id: int):
-        stmt = select(Budget).where(
-            Budget.name.ilike(f"%{budget_name}%"), Budget.user_id == user_id
+    async def search_budgets(self, budget_name: str, user_id: int, limit: int = 5):
+        """Return up to ``limit`` (row, score) pairs ranked by name similarity."""
+        return await lookup_cache.get_or_load(
+            "budgets",
+            user_id,
+            ("search", budget_name.lower(), limit),
+            lambda: search_by_name(self.session, Budget, budget_name, user_id, limit),
         )
-        result = await self.session.execute(stmt)
-        return result.scalar_one_or_none()
+
+    async def get_budget_by_name(self, budget_name: str, user_id: int):
+        matches = await self.search_budgets(budget_name, user_id, limit=1)
+        return matches[0][0] if matches else None
 
     async def create_budget(self, budget_data: BudgetIn, user_id: int):
-        budget = Budget(**budget_data.model_dump())
-        self.session.add(budget)
-        await self.session.commit()
-        await self.session.refresh(budget)
+        budget = await self.insert_returning(budget_data.model_dump())
+        self.invalidate("budgets", user_id)
         return budget
 
     async def list_budgets(self, user_id: int):
@@ -29,6 +38,103 @@ class BudgetRepository:
         return result.scalars().all()
 
     async def get_budget_by_id(self, budget_id: int, user_id: int):
-        stmt = select(Budget).where(Budget.id == budget_id, Budget.user_id == user_id)
+        async def load():
+            stmt = select(*Budget.__table__.columns).where(
+                Budget.id == budget_id, Budget.user_id == user_id
+            )
+            result = await self.session.execute(stmt)
+            return result.one_or_none()
+
+        return await lookup_cache.get_or_load(
+            "budgets", user_id, ("id", budget_id), load
+        )
+
+    async def get_budget_status(self, budget_id: int, user_id: int):
+        """Read a budget's maintained balance; a primary key lookup, never cached."""
+        stmt = select(
+            Budget.id,
+            Budget.name,
+            Budget.budget_period,
+            Budget.total_amount,
+            Budget.current_amount,
+        ).where(Budget.id == budget_id, Budget.user_id == user_id)
         result = await self.session.execute(stmt)
-        return result.scalar_one_or_none()
+        return result.one_or_none()
+
+    async def owned_budget_ids(self, user_id: int, budget_ids: Iterable[int]) -> set[int]:
+        """The IDs among ``budget_ids`` that belong to ``user_id``."""
+        budget_ids = set(budget_ids)
+        if not budget_ids:
+            return set()
+        # A locking read: runs on the primary, which has budgets created moments ago
+        stmt = (
+            select(Budget.id)
+            .where(Budget.user_id == user_id, Budget.id.in_(budget_ids))
+            .with_for_update(read=True)
+        )
+        return set((await self.session.execute(stmt)).scalars())
+
+    async def add_to_balances(self, changes: Iterable[tuple[int, Optional[int], float]]):
+        """Add each ``(user_id, budget_id, amount)`` to the budget's ``current_amount``.
+
+        Runs in the caller's transaction without committing, as one
+        ``UPDATE budgets SET current_amount = current_amount + :delta`` per
+        budget; a budget of another user is left alone. Budgets are updated in
+        ID order so concurrent writers lock them in the same order. Cached
+        budget rows of the users are dropped, as they carry the balance.
+        """
+        deltas = defaultdict(float)
+        for user_id, budget_id, amount in changes:
+            if budget_id is not None:
+                deltas[budget_id, user_id] += amount
+        params = [
+            {"budget_id": budget_id, "owner_id": user_id, "delta": delta}
+            for (budget_id, user_id), delta in sorted(deltas.items())
+            if delta
+        ]
+        if not params:
+            return
+
+        table = Budget.__table__
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("budget_id"), table.c.user_id == bindparam("owner_id"))
+            .values(current_amount=func.coalesce(table.c.current_amount, 0) + bindparam("delta"))
+        )
+        await self.session.execute(stmt, params)
+        for user_id in {p["owner_id"] for p in params}:
+            self.invalidate("budgets", user_id)
+
+    async def reconcile_balances(self, user_id: Optional[int] = None) -> list[dict]:
+        """Correct budgets whose ``current_amount`` drifted from their expenses.
+
+        Drift is applied as a delta rather than overwritten, so expenses
+        committed while this runs are not lost. Returns the corrected budgets.
+        """
+        spent = (
+            select(Expense.budget_id, func.sum(Expense.amount).label("spent"))
+            .where(Expense.budget_id.is_not(None))
+            .group_by(Expense.budget_id)
+            .subquery()
+        )
+        actual = func.coalesce(spent.c.spent, 0)
+        recorded = func.coalesce(Budget.current_amount, 0)
+        stmt = (
+            select(
+                Budget.id, Budget.user_id, recorded.label("recorded"), actual.label("actual")
+            )
+            .outerjoin(spent, spent.c.budget_id == Budget.id)
+            .where(func.abs(recorded - actual) >= 0.005)
+        )
+        if user_id is not None:
+            stmt = stmt.where(Budget.user_id == user_id)
+
+        drifted = (await self.session.execute(stmt)).all()
+        await self.add_to_balances(
+            (row.user_id, row.id, row.actual - row.recorded) for row in drifted
+        )
+        await self.commit()
+        return [
+            {"budget_id": row.id, "recorded": row.recorded, "actual": row.actual}
+            for row in drifted
+        ]
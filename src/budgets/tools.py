@@ -1,61 +1,80 @@
+import json
 from typing import Optional
+from langchain.tools import ToolRuntime
+from langchain_core.messages import ToolMessage
 from langchain_core.tools import StructuredTool
-from sqlalchemy.ext.asyncio.session import AsyncSession
+from langgraph.types import Command
 
+from src.agents.context import AgentContext
 from src.budgets.schemas import BudgetIn
 from src.budgets.repositories import BudgetRepository
 
 
 class BudgetsToolFactory:
-    """Factory to create tools with injected dependencies."""
-
-    def __init__(self, session: AsyncSession, user_id: int):
-        self.repository = BudgetRepository(session)
-        self.user_id = user_id
+    """Factory to create tools that read their dependencies from the runtime context."""
 
     def all(self):
         return [
             self.get_budget_id_tool(),
-            self.create_budget_tool()
+            self.create_budget_tool(),
+            self.get_budget_status_tool(),
         ]
 
     def create_budget_tool(self) -> StructuredTool:
         """Create create_budget tool with injected dependencies."""
 
         async def create_budget(
+            runtime: ToolRuntime[AgentContext],
             name: str,
             total_amount: int,
-            current_amount: int,
             budget_period: Optional[str] = None,
-        ) -> dict:
+        ) -> Command:
             """Create a new budget record in the database.
 
             Args:
                 name: Name of the budget.
                 total_amount: The total allocated amount for the budget.
-                current_amount: The current amount remaining or spent.
                 budget_period: The budget period in YYYY-MM-DD format (optional).
 
             Returns:
-                Dictionary with the created category details
+                Dictionary with the created budget details, also added to budget_context
             """
             budget_data = BudgetIn(
                 name=name,
                 total_amount=total_amount,
-                current_amount=current_amount,
                 budget_period=budget_period,
-                user_id=self.user_id
+                user_id=runtime.context.user_id
             )
 
-            budget = await self.repository.create_budget(budget_data)
+            async with runtime.context.session() as session:
+                budget = await BudgetRepository(session).create_budget(
+                    budget_data, runtime.context.user_id
+                )
 
-            return {
+            result = {
                 "status": "success",
                 "budget": {
                     "id": budget.id,
                     "name": budget.name,
                 },
             }
+            return Command(
+                update={
+                    # Merged into the state, so parallel calls do not overwrite each other
+                    "budget_context": {
+                        budget.name: {
+                            "id": budget.id,
+                            "period": budget.budget_period.isoformat(),
+                        },
+                    },
+                    "messages": [
+                        ToolMessage(
+                            content=json.dumps(result),
+                            tool_call_id=runtime.tool_call_id,
+                        )
+                    ],
+                }
+            )
 
         return StructuredTool.from_function(
             coroutine=create_budget,
@@ -65,24 +84,77 @@ class BudgetsToolFactory:
 
     def get_budget_id_tool(self) -> StructuredTool:
         """
-        Tool for retrieving a budget id by searching for a name (case-insensitive, partial matches allowed).
+        Tool for retrieving a budget id by fuzzy name search (typos and partial matches allowed).
         """
 
-        async def get_budget_id(name: str) -> int:
+        async def get_budget_id(runtime: ToolRuntime[AgentContext], name: str) -> dict:
             """
-            Returns the ID of a category matching the given name (case-insensitive, partial match).
+            Returns the ID of the best matching budget plus up to three ranked matches, or a null ID if nothing matches.
 
             Args:
-                name: The name (or partial name) of the category to search for.
+                name: The name (or partial name) of the budget to search for.
 
             """
-            budget = await self.repository.get_budget_by_name(
-                name, user_id=self.user_id
-            )
-            return budget.id if budget else None
+            async with runtime.context.session() as session:
+                matches = await BudgetRepository(session).search_budgets(
+                    name, user_id=runtime.context.user_id, limit=3
+                )
+            return {
+                "budget_id": matches[0][0].id if matches else None,
+                "matches": [
+                    {"id": b.id, "name": b.name, "score": round(score, 2)}
+                    for b, score in matches
+                ],
+            }
 
         return StructuredTool.from_function(
             coroutine=get_budget_id,
             name="get_budget_id",
-            description="Get the ID of a budget by name (case-insensitive, partial match allowed).",
+            description=(
+                "Get the ID of a budget by name (fuzzy, case-insensitive, partial match allowed). "
+                "Returns budget_id of the best match (null if none) and the ranked matches with similarity scores."
+            ),
+        )
+
+    def get_budget_status_tool(self) -> StructuredTool:
+        """Create the get_budget_status tool for the agent."""
+
+        async def get_budget_status(
+            runtime: ToolRuntime[AgentContext], budget_id: int
+        ) -> dict:
+            """
+            Returns how much of a budget is spent and how much is left.
+
+            Args:
+                budget_id: The ID of the budget.
+            """
+            async with runtime.context.session() as session:
+                budget = await BudgetRepository(session).get_budget_status(
+                    budget_id, runtime.context.user_id
+                )
+            if budget is None:
+                return {"status": "error", "message": f"Budget {budget_id} not found"}
+
+            total = float(budget.total_amount)
+            spent = float(budget.current_amount or 0)
+            return {
+                "status": "success",
+                "budget": {
+                    "id": budget.id,
+                    "name": budget.name,
+                    "period": budget.budget_period.isoformat(),
+                    "total_amount": round(total, 2),
+                    "spent": round(spent, 2),
+                    "remaining": round(total - spent, 2),
+                    "percent_used": round(spent / total * 100, 1) if total else None,
+                },
+            }
+
+        return StructuredTool.from_function(
+            coroutine=get_budget_status,
+            name="get_budget_status",
+            description=(
+                "Get a budget's total, amount spent, amount remaining and percent used. "
+                "Use this instead of adding up expenses to answer how much is left in a budget."
+            ),
         )
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LookupCache:
+    """Per-user LRU cache with TTL for small lookup results.
+
+    Entries are grouped by ``(namespace, user_id)`` so a write can drop every
+    cached lookup of one user at once. Concurrent misses on the same key share
+    one load, and a load that started before an invalidation is not stored. If
+    the task running a shared load is cancelled, the next waiter takes it over.
+
+    Listeners registered with ``add_invalidation_listener`` are called on every
+    local invalidation; use them to broadcast to other workers, which apply
+    the message with ``invalidate(..., broadcast=False)``.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: OrderedDict[tuple, tuple[float, Any]] = OrderedDict()
+        self.user_keys: dict[tuple[str, int], set[tuple]] = {}
+        self.generations: dict[tuple[str, int], int] = {}
+        self.inflight: dict[tuple, asyncio.Future] = {}
+        self.listeners: list[Callable[[str, int], Any]] = []
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+        }
+
+    def add_invalidation_listener(self, listener: Callable[[str, int], Any]):
+        self.listeners.append(listener)
+
+    def _remove(self, key: tuple):
+        self.entries.pop(key, None)
+        keys = self.user_keys.get(key[:2])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.user_keys[key[:2]]
+
+    def _store(self, key: tuple, value: Any):
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        self.user_keys.setdefault(key[:2], set()).add(key)
+        while len(self.entries) > self.max_entries:
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+
+    async def get_or_load(
+        self,
+        namespace: str,
+        user_id: int,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Return the cached value for ``key``, calling ``loader`` on a miss."""
+        full_key = (namespace, user_id, key)
+        if cached := self.entries.get(full_key):
+            expires_at, value = cached
+            if expires_at > time.monotonic():
+                self.hits += 1
+                self.entries.move_to_end(full_key)
+                return value
+            self._remove(full_key)
+
+        self.misses += 1
+        while future := self.inflight.get(full_key):
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Only the task that was loading was cancelled: load it here instead.
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        generation = self.generations.get((namespace, user_id), 0)
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[full_key] = future
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            # Waiters see a cancelled future and retry the load themselves
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception retrieved when nobody else was waiting.
+            future.exception()
+            raise
+        finally:
+            self.inflight.pop(full_key, None)
+
+        if self.generations.get((namespace, user_id), 0) == generation:
+            self._store(full_key, value)
+        future.set_result(value)
+        return value
+
+    def invalidate(self, namespace: str, user_id: int, broadcast: bool = True):
+        """Drop every cached lookup of ``user_id`` in ``namespace``."""
+        self.generations[(namespace, user_id)] = (
+            self.generations.get((namespace, user_id), 0) + 1
+        )
+        for key in list(self.user_keys.get((namespace, user_id), ())):
+            self._remove(key)
+
+        if broadcast:
+            for listener in self.listeners:
+                try:
+                    listener(namespace, user_id)
+                except Exception:
+                    logger.exception("Cache invalidation listener failed")
+
+    def clear(self):
+        self.entries.clear()
+        self.user_keys.clear()
+        self.generations.clear()
+
+
+lookup_cache = LookupCache(
+    max_entries=settings.LOOKUP_CACHE_MAX_ENTRIES, ttl=settings.LOOKUP_CACHE_TTL
+)
@@ -0,0 +1,90 @@
+"""Per-user naive Bayes classifier from expense descriptions to categories.
+
+Features are a description's words and its pg_trgm-style trigrams, so
+"grocery" and "groceries" share most of theirs. The model is nothing but
+counts, kept in ``category_term_counts`` by every expense write:
+
+- ``(category_id, DOCUMENTS)``: the user's expenses in the category
+- ``(category_id, term)``: those of them whose description has ``term``
+
+An expense trains it by adding its counts and untrains it by subtracting
+them, so there is nothing to retrain.
+"""
+
+import math
+import re
+from collections import defaultdict
+from typing import Iterable
+
+from src.fuzzy import trigrams
+
+# Term of the per-category expense counts
+DOCUMENTS = ""
+MAX_WORD_LENGTH = 32
+SMOOTHING = 1.0
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def features(description: str) -> set[str]:
+    """Words, prefixed with ``w:``, and trigrams of ``description``."""
+    words = {f"w:{word[:MAX_WORD_LENGTH]}" for word in _WORD.findall(description.lower())}
+    return words | trigrams(description)
+
+
+def term_changes(row, sign: int = 1) -> list[tuple[tuple[int, int, str], int]]:
+    """``((user_id, category_id, term), count)`` changes of adding or removing an expense."""
+    if not row.category_id or not row.description:
+        return []
+    key = (row.user_id, row.category_id)
+    return [((*key, DOCUMENTS), sign)] + [
+        ((*key, term), sign) for term in features(row.description)
+    ]
+
+
+class CategoryClassifier:
+    """Multinomial naive Bayes over one user's ``(category_id, term, count)`` rows."""
+
+    def __init__(self, counts: Iterable[tuple[int, str, int]]):
+        self.documents: dict[int, int] = {}
+        self.terms: dict[int, dict[str, int]] = defaultdict(dict)
+        self.totals: dict[int, int] = defaultdict(int)
+        self.vocabulary: set[str] = set()
+        for category_id, term, count in counts:
+            if term == DOCUMENTS:
+                self.documents[category_id] = count
+            else:
+                self.terms[category_id][term] = count
+                self.totals[category_id] += count
+                self.vocabulary.add(term)
+
+    def __len__(self) -> int:
+        return sum(self.documents.values())
+
+    def predict(self, description: str, limit: int = 3) -> list[tuple[int, float]]:
+        """Up to ``limit`` ``(category_id, probability)`` pairs, most likely first.
+
+        Empty when the model knows fewer than two categories or none of the
+        description's terms.
+        """
+        terms = features(description) & self.vocabulary
+        if not terms or len(self.documents) < 2:
+            return []
+
+        total = len(self)
+        smoothed_vocabulary = SMOOTHING * len(self.vocabulary)
+        scores = {}
+        for category_id, documents in self.documents.items():
+            counts = self.terms[category_id]
+            denominator = math.log(self.totals[category_id] + smoothed_vocabulary)
+            scores[category_id] = (
+                math.log(documents / total)
+                + sum(math.log(counts.get(term, 0) + SMOOTHING) for term in terms)
+                - len(terms) * denominator
+            )
+
+        best = max(scores.values())
+        weights = {c: math.exp(score - best) for c, score in scores.items()}
+        norm = sum(weights.values())
+        ranked = sorted(weights.items(), key=lambda item: -item[1])[:limit]
+        return [(category_id, weight / norm) for category_id, weight in ranked]
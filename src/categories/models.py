@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from src.database import Base
@@ -6,6 +6,16 @@ from src.database import Base
 
 class Category(Base):
     __tablename__ = "categories"
+    __table_args__ = (
+        Index(
+            "ix_categories_user_id_name_trgm",
+            "user_id",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        Index("ix_categories_user_id_lower_name", "user_id", text("lower(name)")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
@@ -18,3 +28,21 @@ class Category(Base):
 
     user = relationship("User", back_populates="categories")
     expenses = relationship("Expense", back_populates="category")
+
+
+class CategoryTermCount(Base):
+    """Naive Bayes counts of ``src.categories.classifier``, kept by every expense write.
+
+    ``term`` is ``""`` on the row counting the category's expenses.
+    """
+
+    __tablename__ = "category_term_counts"
+
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    category_id = Column(
+        Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True
+    )
+    term = Column(String(40), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
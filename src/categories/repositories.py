@@ -1,26 +1,39 @@
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from collections import defaultdict
+from typing import Iterable, Optional
 
-from src.categories.models import Category
+from sqlalchemy import delete, select
+
+from src.cache import lookup_cache
+from src.fuzzy import search_by_name
+from src.repositories import BaseRepository
+from src.categories.classifier import CategoryClassifier, term_changes
+from src.categories.models import Category, CategoryTermCount
 from src.categories.schemas import CategoryIn
+from src.expenses.models import Expense
 
+# Expenses read per query by CategoryTermRepository.rebuild
+REBUILD_BATCH_SIZE = 1000
 
-class CategoryRepository:
-    def __init__(self, session: AsyncSession):
-        self.session = session
 
-    async def get_category_by_name(self, category_name: str, user_id: int):
-        stmt = select(Category).where(
-            Category.name.ilike(f"%{category_name}%"), Category.user_id == user_id
+class CategoryRepository(BaseRepository):
+    model = Category
+
+    async def search_categories(self, category_name: str, user_id: int, limit: int = 5):
+        """Return up to ``limit`` (row, score) pairs ranked by name similarity."""
+        return await lookup_cache.get_or_load(
+            "categories",
+            user_id,
+            ("search", category_name.lower(), limit),
+            lambda: search_by_name(self.session, Category, category_name, user_id, limit),
         )
-        result = await self.session.execute(stmt)
-        return result.scalar_one_or_none()
+
+    async def get_category_by_name(self, category_name: str, user_id: int):
+        matches = await self.search_categories(category_name, user_id, limit=1)
+        return matches[0][0] if matches else None
 
     async def create_category(self, category_data: CategoryIn):
-        category = Category(**category_data.model_dump())
-        self.session.add(category)
-        await self.session.commit()
-        await self.session.refresh(category)
+        category = await self.insert_returning(category_data.model_dump())
+        self.invalidate("categories", category.user_id)
         return category
 
     async def list_categories(self, user_id: int):
@@ -29,8 +42,73 @@ class CategoryRepository:
         return result.scalars().all()
 
     async def get_category_by_id(self, category_id: int, user_id: int):
-        stmt = select(Category).where(
-            Category.id == category_id, Category.user_id == user_id
+        async def load():
+            stmt = select(*Category.__table__.columns).where(
+                Category.id == category_id, Category.user_id == user_id
+            )
+            result = await self.session.execute(stmt)
+            return result.one_or_none()
+
+        return await lookup_cache.get_or_load(
+            "categories", user_id, ("id", category_id), load
         )
-        result = await self.session.execute(stmt)
-        return result.scalar_one_or_none()
+
+
+class CategoryTermRepository(BaseRepository):
+    """Per-user category classifier counts kept in step with the expenses table."""
+
+    model = CategoryTermCount
+
+    async def add(self, changes: Iterable[tuple[tuple[int, int, str], int]]):
+        """Add ``(key, count)`` changes to their term rows, creating them.
+
+        Runs in the caller's transaction without committing.
+        """
+        totals = defaultdict(int)
+        for key, count in changes:
+            totals[key] += count
+        params = [
+            {"user_id": user_id, "category_id": category_id, "term": term, "count": count}
+            for (user_id, category_id, term), count in sorted(totals.items())
+            if count
+        ]
+        await self.upsert_add(params, ["count"])
+        for user_id in {p["user_id"] for p in params}:
+            self.invalidate("category_terms", user_id)
+
+    async def classifier(self, user_id: int) -> CategoryClassifier:
+        async def load():
+            table = CategoryTermCount.__table__
+            stmt = select(table.c.category_id, table.c.term, table.c.count).where(
+                table.c.user_id == user_id, table.c.count > 0
+            )
+            return CategoryClassifier(await self.session.execute(stmt))
+
+        return await lookup_cache.get_or_load("category_terms", user_id, "classifier", load)
+
+    async def suggest_categories(self, description: str, user_id: int, limit: int = 3):
+        """Return up to ``limit`` (category_id, confidence) pairs for ``description``."""
+        return (await self.classifier(user_id)).predict(description, limit)
+
+    async def rebuild(self, user_id: Optional[int] = None) -> int:
+        """Recount the terms from the expenses table; returns the expenses counted."""
+        table = CategoryTermCount.__table__
+        clear = delete(table)
+        source = (
+            select(Expense.id, Expense.user_id, Expense.category_id, Expense.description)
+            .where(Expense.category_id.is_not(None))
+            .order_by(Expense.id)
+            .limit(REBUILD_BATCH_SIZE)
+        )
+        if user_id is not None:
+            clear = clear.where(table.c.user_id == user_id)
+            source = source.where(Expense.user_id == user_id)
+        await self.session.execute(clear)
+
+        counted, last_id = 0, 0
+        while rows := (await self.session.execute(source.where(Expense.id > last_id))).all():
+            await self.add(change for row in rows for change in term_changes(row))
+            counted += len(rows)
+            last_id = rows[-1].id
+        await self.commit()
+        return counted
@@ -0,0 +1,31 @@
+"""Rebuild the category classifier counts from the expenses table.
+
+Every expense write keeps ``category_term_counts`` up to date; run this to
+backfill them, to repair them after writes that bypassed the repositories,
+or after changing how ``src.categories.classifier`` extracts terms:
+
+    python -m src.categories.terms [--user-id 1]
+"""
+
+import logging
+from typing import Optional
+
+# Register the mappers Category's relationships refer to
+import src.budgets.models  # noqa: F401
+from src.categories.repositories import CategoryTermRepository
+from src.maintenance import run_cli, run_in_session
+
+logger = logging.getLogger(__name__)
+
+
+async def rebuild(user_id: Optional[int] = None) -> int:
+    counted = await run_in_session(
+        lambda session: CategoryTermRepository(session).rebuild(user_id)
+    )
+
+    logger.info("Rebuilt category term counts from %d expenses", counted)
+    return counted
+
+
+if __name__ == "__main__":
+    run_cli(__doc__, rebuild, "only this user's counts")
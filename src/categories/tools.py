@@ -1,17 +1,17 @@
+import json
 from typing import Optional
+from langchain.tools import ToolRuntime
+from langchain_core.messages import ToolMessage
 from langchain_core.tools import StructuredTool
-from sqlalchemy.ext.asyncio.session import AsyncSession
+from langgraph.types import Command
 
+from src.agents.context import AgentContext
 from src.categories.schemas import CategoryIn
 from src.categories.repositories import CategoryRepository
 
 
 class CategoriesToolFactory:
-    """Factory to create tools with injected dependencies."""
-
-    def __init__(self, session: AsyncSession, user_id: int):
-        self.repository = CategoryRepository(session)
-        self.user_id = user_id
+    """Factory to create tools that read their dependencies from the runtime context."""
 
     def all(self):
         return [self.get_category_id_tool(), self.create_category_tool()]
@@ -20,28 +20,44 @@ class CategoriesToolFactory:
         """Create create_category tool with injected dependencies."""
 
         async def create_category(
+            runtime: ToolRuntime[AgentContext],
             name: str,
             notes: Optional[str] = None,
-        ) -> dict:
+        ) -> Command:
             """Create a new expense record in the database.
 
             Args:
                 name: Name of the category
                 notes: Simple notes for the category
             Returns:
-                Dictionary with the created category details
+                Dictionary with the created category details, also added to categories_context
             """
-            category_data = CategoryIn(name=name, notes=notes, user_id=self.user_id)
+            category_data = CategoryIn(
+                name=name, notes=notes, user_id=runtime.context.user_id
+            )
 
-            category = await self.repository.create_category(category_data)
+            async with runtime.context.session() as session:
+                category = await CategoryRepository(session).create_category(category_data)
 
-            return {
+            result = {
                 "status": "success",
                 "category": {
                     "id": category.id,
                     "name": category.name,
                 },
             }
+            return Command(
+                update={
+                    # Merged into the state, so parallel calls do not overwrite each other
+                    "categories_context": {category.name: category.id},
+                    "messages": [
+                        ToolMessage(
+                            content=json.dumps(result),
+                            tool_call_id=runtime.tool_call_id,
+                        )
+                    ],
+                }
+            )
 
         return StructuredTool.from_function(
             coroutine=create_category,
@@ -51,23 +67,30 @@ class CategoriesToolFactory:
 
     def get_category_id_tool(self) -> StructuredTool:
         """
-        Tool for retrieving a category id by searching for a name (case-insensitive, partial matches allowed).
+        Tool for retrieving a category id by fuzzy name search (typos and partial matches allowed).
         """
 
-        async def get_category_id(name: str) -> int:
+        async def get_category_id(runtime: ToolRuntime[AgentContext], name: str) -> dict:
             """
-            Returns the ID of a category matching the given name (case-insensitive, partial match), or None if not found.
+            Returns the ID of the best matching category plus up to three ranked matches, or a null ID if nothing matches.
             """
-            category = await self.repository.get_category_by_name(
-                name, user_id=self.user_id
-            )
-            return category.id if category else None
+            async with runtime.context.session() as session:
+                matches = await CategoryRepository(session).search_categories(
+                    name, user_id=runtime.context.user_id, limit=3
+                )
+            return {
+                "category_id": matches[0][0].id if matches else None,
+                "matches": [
+                    {"id": c.id, "name": c.name, "score": round(score, 2)}
+                    for c, score in matches
+                ],
+            }
 
         return StructuredTool.from_function(
             coroutine=get_category_id,
             name="get_category_id",
             description=(
-                "Get the ID of a category by name (case-insensitive, partial match allowed). "
-                "Returns just the integer category_id, or None if not found."
+                "Get the ID of a category by name (fuzzy, case-insensitive, partial match allowed). "
+                "Returns category_id of the best match (null if none) and the ranked matches with similarity scores."
             ),
         )
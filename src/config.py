@@ -9,4 +9,60 @@ class Settings(BaseSettings):
     DATABASE_ASYNC_DSN: str
     DATABASE_SYNC_DSN: str
 
+    # Connection pool, per process
+    DATABASE_POOL_SIZE: int = 10
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: float = 30.0  # seconds to wait for a connection
+    DATABASE_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced
+    DATABASE_POOL_PRE_PING: bool = True
+    DATABASE_STATEMENT_CACHE_SIZE: int = 100  # asyncpg; 0 behind PgBouncer
+    DATABASE_WARM_CONNECTIONS: int = 5  # opened per engine at startup
+    # Backoff between retries of failed startup warm-up steps, in seconds
+    WARMUP_RETRY_INITIAL_DELAY: float = 1.0
+    WARMUP_RETRY_MAX_DELAY: float = 30.0
+
+    # Read replicas, as a JSON list of async DSNs; reads go to them round-robin
+    DATABASE_REPLICA_DSNS: list[str] = []
+    DATABASE_REPLICA_CHECK_INTERVAL: float = 10.0  # seconds between health checks
+
+    AGENT_MODEL: str = "gpt-4o-mini"
+    # Commit the tool writes of a turn once, at the end of the turn
+    AGENT_UNIT_OF_WORK: bool = False
+    # Classifier confidence needed to suggest a category the user did not name
+    CATEGORY_SUGGESTION_MIN_CONFIDENCE: float = 0.7
+
+    # Chat streaming: token frames go out at this size or this long after their first token
+    CHAT_STREAM_FRAME_BYTES: int = 256
+    CHAT_STREAM_FRAME_WINDOW: float = 0.02  # seconds
+    CHAT_DISCONNECT_POLL_INTERVAL: float = 0.25  # seconds between client disconnect checks
+    # One-line expenses are created without the agent when their names resolve
+    CHAT_FAST_PATH: bool = True
+    CHAT_FAST_PATH_MIN_SCORE: float = 0.6  # similarity a lone non-exact name match needs
+
+    # Chat WebSocket, in seconds
+    CHAT_WS_HEARTBEAT_INTERVAL: float = 20.0  # a heartbeat goes out after this long without frames
+    CHAT_WS_IDLE_TIMEOUT: float = 300.0  # closed after this long without a message or turn
+    CHAT_WS_SEND_TIMEOUT: float = 10.0  # a client that reads no frame for this long is dropped
+
+    # Conversation history, in prompt tokens per model
+    HISTORY_TOKEN_BUDGETS: dict[str, int] = {"gpt-4o-mini": 6000, "gpt-4o": 12000}
+    HISTORY_DEFAULT_TOKEN_BUDGET: int = 4000
+    HISTORY_KEEP_TURNS: int = 4
+    HISTORY_SUMMARY_MAX_TOKENS: int = 400
+
+    # Conversation checkpoints
+    CHECKPOINTER_BACKEND: str = "postgres"  # "postgres" or "memory"
+    CHECKPOINT_MAX_PER_THREAD: int = 20
+    CHECKPOINT_COMPACTION_INTERVAL: float = 30.0  # seconds
+    CHECKPOINT_MEMORY_BUDGET_BYTES: int = 64 * 1024 * 1024
+    CHECKPOINT_TTL: float = 3600.0  # seconds a thread may stay idle in memory
+
+    # Per-user category/budget lookup cache
+    LOOKUP_CACHE_MAX_ENTRIES: int = 10000
+    LOOKUP_CACHE_TTL: float = 300.0  # seconds
+
+    # Bulk expense import
+    IMPORT_BATCH_SIZE: int = 1000  # rows validated and loaded per COPY
+    IMPORT_MAX_ERRORS: int = 1000  # row errors kept per import
+
 settings = Settings()
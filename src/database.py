@@ -1,35 +1,281 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.orm import DeclarativeBase
+import asyncio
+import itertools
+import logging
+import time
+from functools import partial
+
+from sqlalchemy import Select, event, exc, text
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    create_async_engine,
+    async_sessionmaker,
+)
+from sqlalchemy.orm import DeclarativeBase, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from src.config import settings
 
+logger = logging.getLogger(__name__)
+
+# session.info key: once set, every statement of the session goes to the primary
+USE_PRIMARY = "use_primary"
+
 
 class Base(DeclarativeBase):
     pass
 
 
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long checkouts wait for a connection."""
+
+    # Log under "sqlalchemy", which SQLAlchemy keeps at WARNING, instead of
+    # "src.database", which would pass the pool's INFO messages to the app log
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.TimedQueuePool"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.checkouts += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+
+class RoutingSession(Session):
+    """Session that sends plain SELECTs to a read replica.
+
+    Writes, locking reads and ``session.connection()`` go to the primary, and
+    after the first of them the session sticks to the primary, so the rest of
+    its transaction reads its own writes.
+    """
+
+    def connection(self, *args, **kwargs):
+        self.info[USE_PRIMARY] = True
+        return super().connection(*args, **kwargs)
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if clause is None:
+            # Not a statement, e.g. a bare get_bind() to look at the dialect
+            return Database.engine.sync_engine
+        if (
+            isinstance(clause, Select)
+            and clause._for_update_arg is None
+            and not self._flushing
+            and not self.info.get(USE_PRIMARY)
+        ):
+            return Database.replica().sync_engine
+        self.info[USE_PRIMARY] = True
+        return Database.engine.sync_engine
+
+
 class Database:
     engine = None
     async_session = None
+    replicas: list[AsyncEngine] = []
+    unhealthy: set[AsyncEngine] = set()
+    _rotation = itertools.count()
+    _health_task: asyncio.Task | None = None
 
     @classmethod
     def connect(cls):
         if not cls.engine:
-            cls.engine = create_async_engine(
-                settings.DATABASE_ASYNC_DSN, future=True, echo=False
-            )
+            cls.engine = cls._create_engine(settings.DATABASE_ASYNC_DSN)
+            cls.replicas = [
+                cls._create_engine(dsn) for dsn in settings.DATABASE_REPLICA_DSNS
+            ]
+            for replica in cls.replicas:
+                event.listen(
+                    replica.sync_engine, "handle_error", partial(cls._on_replica_error, replica)
+                )
             cls.async_session = async_sessionmaker(
-                cls.engine, expire_on_commit=False, class_=AsyncSession
+                cls.engine,
+                expire_on_commit=False,
+                class_=AsyncSession,
+                sync_session_class=RoutingSession if cls.replicas else Session,
+            )
+
+    @staticmethod
+    def _create_engine(dsn: str) -> AsyncEngine:
+        connect_args = {}
+        if dsn.startswith("postgresql+asyncpg"):
+            # 0 disables both caches, as PgBouncer in transaction mode requires
+            connect_args = {
+                "statement_cache_size": settings.DATABASE_STATEMENT_CACHE_SIZE,
+                "prepared_statement_cache_size": settings.DATABASE_STATEMENT_CACHE_SIZE,
+            }
+
+        return create_async_engine(
+            dsn,
+            future=True,
+            echo=False,
+            poolclass=TimedQueuePool,
+            pool_size=settings.DATABASE_POOL_SIZE,
+            max_overflow=settings.DATABASE_MAX_OVERFLOW,
+            pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+            pool_recycle=settings.DATABASE_POOL_RECYCLE,
+            pool_pre_ping=settings.DATABASE_POOL_PRE_PING,
+            connect_args=connect_args,
+        )
+
+    @classmethod
+    def replica(cls) -> AsyncEngine:
+        """Next healthy replica, round-robin; the primary when none is healthy."""
+        cls._ensure_health_task()
+        healthy = [replica for replica in cls.replicas if replica not in cls.unhealthy]
+        if not healthy:
+            return cls.engine
+        return healthy[next(cls._rotation) % len(healthy)]
+
+    @classmethod
+    def _on_replica_error(cls, replica: AsyncEngine, context):
+        # Stop routing to a replica that dropped a connection until it passes a check
+        if context.is_disconnect and replica not in cls.unhealthy:
+            logger.warning("Replica %s disconnected, routing reads elsewhere", replica.url.host)
+            cls.unhealthy.add(replica)
+
+    @classmethod
+    async def check_replicas(cls):
+        """Ping every replica and update which ones receive reads."""
+
+        async def ping(replica: AsyncEngine):
+            async with replica.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        results = await asyncio.gather(
+            *(
+                asyncio.wait_for(ping(replica), settings.DATABASE_REPLICA_CHECK_INTERVAL)
+                for replica in cls.replicas
+            ),
+            return_exceptions=True,
+        )
+        for replica, result in zip(cls.replicas, results):
+            if isinstance(result, BaseException):
+                if replica not in cls.unhealthy:
+                    logger.warning(
+                        "Replica %s failed its health check: %r", replica.url.host, result
+                    )
+                cls.unhealthy.add(replica)
+            elif replica in cls.unhealthy:
+                logger.info("Replica %s is healthy again", replica.url.host)
+                cls.unhealthy.discard(replica)
+
+    @classmethod
+    def _ensure_health_task(cls):
+        if not cls.replicas or (cls._health_task and not cls._health_task.done()):
+            return
+        try:
+            cls._health_task = asyncio.get_running_loop().create_task(cls._health_loop())
+        except RuntimeError:
+            pass  # no event loop; reads still route, unchecked
+
+    @classmethod
+    async def _health_loop(cls):
+        while True:
+            try:
+                await cls.check_replicas()
+            except Exception:
+                logger.exception("Replica health check failed")
+            await asyncio.sleep(settings.DATABASE_REPLICA_CHECK_INTERVAL)
+
+    @classmethod
+    async def warm_up(cls, connections: int) -> int:
+        """Open ``connections`` pooled connections per engine ahead of the first request."""
+        cls.connect()
+
+        async def open_connection(engine: AsyncEngine):
+            connection = await engine.connect()
+            await connection.execute(text("SELECT 1"))
+            return connection
+
+        opened = 0
+        for engine in (cls.engine, *cls.replicas):
+            count = min(connections, engine.pool.size())
+            results = await asyncio.gather(
+                *(open_connection(engine) for _ in range(count)), return_exceptions=True
             )
+            errors = [result for result in results if isinstance(result, BaseException)]
+            for connection in results:
+                if not isinstance(connection, BaseException):
+                    await connection.close()
+                    opened += 1
+            # An unreachable replica is left to the health checks
+            if errors and engine is cls.engine:
+                raise errors[0]
+        return opened
+
+    @classmethod
+    def session_factory(cls) -> async_sessionmaker[AsyncSession]:
+        if not cls.async_session:
+            cls.connect()
+        return cls.async_session
 
     @classmethod
     async def get_async_session(cls):
+        """FastAPI dependency yielding a session that is always closed afterwards.
+
+        Uncommitted work is rolled back and the connection goes back to the pool
+        when the request, including a streamed response, is finished.
+        """
         if not cls.async_session:
             cls.connect()
-        return cls.async_session()
+        async with cls.async_session() as session:
+            try:
+                yield session
+            except BaseException:
+                await session.rollback()
+                raise
+
+    @classmethod
+    def pool_stats(cls) -> dict:
+        if not cls.engine:
+            return {"connected": False}
+        return {
+            "connected": True,
+            **cls._pool_stats(cls.engine.pool),
+            "replicas": [
+                {"healthy": replica not in cls.unhealthy, **cls._pool_stats(replica.pool)}
+                for replica in cls.replicas
+            ],
+        }
+
+    @staticmethod
+    def _pool_stats(pool: TimedQueuePool) -> dict:
+        return {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+            "checkouts": pool.checkouts,
+            "timeouts": pool.timeouts,
+            "avg_wait_ms": (
+                round(pool.wait_seconds / pool.checkouts * 1000, 3) if pool.checkouts else 0.0
+            ),
+            "max_wait_ms": round(pool.max_wait_seconds * 1000, 3),
+        }
 
     @classmethod
     async def close(cls):
+        if cls._health_task:
+            cls._health_task.cancel()
+            cls._health_task = None
+        for replica in cls.replicas:
+            await replica.dispose()
+        cls.replicas = []
+        cls.unhealthy = set()
         if cls.engine:
             await cls.engine.dispose()
             cls.engine = None
@@ -0,0 +1,133 @@
+import codecs
+import csv
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional
+
+from src.config import settings
+
+# Finished imports kept around for the status endpoint
+MAX_TRACKED_IMPORTS = 100
+
+
+@dataclass
+class ImportProgress:
+    import_id: str
+    user_id: int
+    status: str = "running"  # running, completed, failed or cancelled
+    rows: int = 0
+    imported: int = 0
+    failed: int = 0
+    errors: list[dict] = field(default_factory=list)
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+
+    def add_error(self, line: int, errors: list[str]):
+        self.failed += 1
+        if len(self.errors) < settings.IMPORT_MAX_ERRORS:
+            self.errors.append({"line": line, "errors": errors})
+
+    def finish(self, status: str):
+        self.status = status
+        self.finished_at = time.monotonic()
+
+    def to_dict(self) -> dict:
+        elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        return {
+            "import_id": self.import_id,
+            "status": self.status,
+            "rows": self.rows,
+            "imported": self.imported,
+            "failed": self.failed,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.rows / elapsed, 1) if elapsed else None,
+            "errors": sorted(self.errors, key=lambda e: e["line"]),
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+imports: OrderedDict[str, ImportProgress] = OrderedDict()
+
+
+def start_import(import_id: str, user_id: int) -> ImportProgress:
+    """Register a new import so its progress can be polled while it runs."""
+    progress = ImportProgress(import_id=import_id, user_id=user_id)
+    imports[import_id] = progress
+    imports.move_to_end(import_id)
+    while len(imports) > MAX_TRACKED_IMPORTS:
+        oldest = next(iter(imports.values()))
+        if oldest.status == "running":
+            break
+        imports.popitem(last=False)
+    return progress
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream into lines without holding more than one chunk."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.removesuffix("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.removesuffix("\r")
+
+
+async def iter_records(
+    chunks: AsyncIterator[bytes], format: str
+) -> AsyncIterator[tuple[int, Optional[dict], Optional[str]]]:
+    """Yield ``(line, record, error)`` for each record of a CSV or JSONL stream.
+
+    ``line`` is the line the record starts on. Exactly one of ``record`` and
+    ``error`` is set. CSV needs a header row; quoted fields may span lines.
+    """
+    line_number = 0
+    if format == "jsonl":
+        async for line in iter_lines(chunks):
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_number, None, f"invalid JSON: {e}"
+                continue
+            if isinstance(record, dict):
+                yield line_number, record, None
+            else:
+                yield line_number, None, "expected a JSON object"
+        return
+
+    header = None
+    pending, quotes, start = [], 0, 1
+    async for line in iter_lines(chunks):
+        line_number += 1
+        if not pending:
+            start = line_number
+        pending.append(line)
+        # An odd number of quotes means a quoted field continues on the next line
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+
+        values = next(csv.reader(part + "\n" for part in pending), [])
+        pending, quotes = [], 0
+        if not any(value.strip() for value in values):
+            continue
+        if header is None:
+            header = [name.strip().lower() for name in values]
+            continue
+        if len(values) != len(header):
+            yield start, None, f"expected {len(header)} columns, got {len(values)}"
+            continue
+        yield start, {
+            name: value.strip() or None for name, value in zip(header, values)
+        }, None
+
+    if pending:
+        yield start, None, "unterminated quoted field"
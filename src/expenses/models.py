@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text
-from datetime import datetime
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Text, Index, text
+from datetime import date, datetime
 
 from sqlalchemy.orm import relationship
 from src.database import Base
@@ -7,8 +7,23 @@ from src.database import Base
 from sqlalchemy import ForeignKey
 from src.users.models import User
 
+# ExpenseMonthlyRollup.month of expenses without date_spent
+UNDATED_MONTH = date(1, 1, 1)
+
+
 class Expense(Base):
     __tablename__ = "expenses"
+    __table_args__ = (
+        # Matches the keyset order of ExpenseRepository.list_expenses
+        Index(
+            "ix_expenses_user_id_date_spent_id",
+            "user_id",
+            text("date_spent DESC NULLS LAST"),
+            text("id DESC"),
+        ).ddl_if(dialect="postgresql"),
+        Index("ix_expenses_user_id_category_id", "user_id", "category_id"),
+        Index("ix_expenses_user_id_budget_id", "user_id", "budget_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     description = Column(String(255), nullable=False)
@@ -29,3 +44,23 @@ class Expense(Base):
     category = relationship("Category", back_populates="expenses")
     budgets = relationship("Budget", back_populates="expenses")
     user = relationship(User, back_populates="expenses")
+
+
+class ExpenseMonthlyRollup(Base):
+    """Per-user monthly totals, maintained by every expense write.
+
+    ``month`` is the first day of the month of ``date_spent``. Undated
+    expenses, and those without a category or budget, are keyed by
+    UNDATED_MONTH and 0 so every key column can be part of the primary key.
+    """
+
+    __tablename__ = "expense_monthly_rollups"
+
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    month = Column(Date, primary_key=True)
+    category_id = Column(Integer, primary_key=True, default=0)
+    budget_id = Column(Integer, primary_key=True, default=0)
+    total = Column(Float, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,157 @@
+"""Rule-based parser for one-line expense entries.
+
+Understands messages like::
+
+    spent 250 on lunch (food) from monthly budget today
+    paid ₱1,200.50 for groceries, category food, budget household, yesterday
+    coffee 120 [daily] (drinks) 2024-03-01 as wants
+
+and gives up, returning ``None``, on anything it is not sure about: no,
+signed or several amounts, several expenses, questions, commands and
+negations, other currencies, dates it does not know, or words it cannot
+place.
+"""
+
+import re
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Optional
+
+AMOUNT = re.compile(
+    r"(?<![\w.+\-−])(?:₱|\$|php\s*|p(?=\d))?"
+    r"(\d{1,3}(?:,\d{3})+|\d+)(\.\d{1,2})?"
+    r"(?:\s*(?:pesos?|php|dollars?))?(?![\w.])",
+    re.IGNORECASE,
+)
+ISO_DATE = re.compile(r"\b(?:on\s+)?(\d{4}-\d{2}-\d{2})\b", re.IGNORECASE)
+RELATIVE_DATE = re.compile(
+    r"\b(today|this morning|tonight|yesterday|last night|(\d{1,2})\s+days?\s+ago)\b",
+    re.IGNORECASE,
+)
+# Tried in order: "(food)", "under food category", "category food,"
+CATEGORY = (
+    re.compile(r"\(([^()]+)\)"),
+    re.compile(r"\b(?:under|in)\s+(?:the\s+)?([^,;()\[\]]+?)\s+category\b", re.IGNORECASE),
+    re.compile(r"\bcategory\s*[:=]?\s*([^,;()\[\]]+?)\s*(?=[,;]|$)", re.IGNORECASE),
+)
+# "[monthly]", "from my monthly budget", "budget monthly,"
+BUDGET = (
+    re.compile(r"\[([^\[\]]+)\]"),
+    re.compile(
+        r"\b(?:from|using)\s+(?:my\s+|the\s+)?([^,;()\[\]]+?)\s+budget\b", re.IGNORECASE
+    ),
+    re.compile(r"\bbudget\s*[:=]?\s*([^,;()\[\]]+?)\s*(?=[,;]|$)", re.IGNORECASE),
+)
+SPENDING_TYPE = re.compile(r"\b(?:as\s+(?:a\s+)?)(needs?|wants?)\b", re.IGNORECASE)
+LEADING_VERB = re.compile(
+    r"^\s*(?:i\s+)?(?:spent|paid|bought|add(?:ed)?|log(?:ged)?|expense)\b[\s:]*",
+    re.IGNORECASE,
+)
+CONNECTOR = re.compile(r"^(?:on|for|at)\s+|\s+(?:on|for|at)$", re.IGNORECASE)
+# Signs of something other than one plain expense
+GIVE_UP = re.compile(
+    r"\?|&|\d|[€£¥]|(?<!\S)[+\-−](?!\S)"
+    r"|\b(?:and|also|plus|then|budget|category|how|what|show|list)\b"
+    # Commands and negations: "delete 250 lunch", "don't add 250 lunch"
+    r"|\b(?:delete|remove|refund|cancel|undo|edit|update|change|not|never|no|dont)\b|n['’]t\b"
+    # Dates RELATIVE_DATE does not know: "tomorrow", "last week", "on monday"
+    r"|\b(?:tomorrow|ago|last|next|week|weekend|month|year"
+    r"|(?:mon|tues|wednes|thurs|fri|satur|sun)day"
+    r"|january|february|march|april|june|july|august|september|october|november|december)s?\b"
+    # Other currencies: "250 in EUR"
+    r"|\b(?:eur|euros?|usd|gbp|jpy|yen|pounds?|cents?)\b",
+    re.IGNORECASE,
+)
+
+MAX_DESCRIPTION_WORDS = 8
+
+
+@dataclass
+class ParsedExpense:
+    amount: float
+    description: str
+    category: Optional[str] = None
+    budget: Optional[str] = None
+    date_spent: Optional[date] = None  # None means now
+    spending_type: Optional[str] = None
+
+
+def take(patterns, text: str) -> tuple[Optional[str], str]:
+    """Remove the single match of ``patterns`` from ``text``; ``...`` if there are several."""
+    for pattern in patterns:
+        matches = list(pattern.finditer(text))
+        if len(matches) > 1:
+            return ..., text
+        if matches:
+            match = matches[0]
+            return match.group(1).strip(), text[: match.start()] + " " + text[match.end() :]
+    return None, text
+
+
+def parse_date(text: str, today: date) -> tuple[Optional[date], str]:
+    value, rest = take((ISO_DATE,), text)
+    if value is ...:
+        return ..., text
+    if value:
+        try:
+            return date.fromisoformat(value), rest
+        except ValueError:
+            return ..., text
+
+    matches = list(RELATIVE_DATE.finditer(text))
+    if len(matches) > 1:
+        return ..., text
+    if not matches:
+        return None, text
+    match = matches[0]
+    phrase = match.group(1).lower()
+    rest = text[: match.start()] + " " + text[match.end() :]
+    if phrase in ("yesterday", "last night"):
+        return today - timedelta(days=1), rest
+    if match.group(2):
+        return today - timedelta(days=int(match.group(2))), rest
+    return None, rest
+
+
+def parse_expense(text: str, today: date) -> Optional[ParsedExpense]:
+    """Parse a one-line expense, or return ``None`` if it is not clearly one."""
+    rest = text.strip().rstrip(".!")
+    if not rest or "\n" in rest:
+        return None
+
+    category, rest = take(CATEGORY, rest)
+    budget, rest = take(BUDGET, rest)
+    date_spent, rest = parse_date(rest, today)
+    spending_type, rest = take((SPENDING_TYPE,), rest)
+    if ... in (category, budget, date_spent, spending_type):
+        return None
+
+    amounts = list(AMOUNT.finditer(rest))
+    if len(amounts) != 1:
+        return None
+    match = amounts[0]
+    amount = float(match.group(1).replace(",", "") + (match.group(2) or ""))
+    rest = rest[: match.start()] + " " + rest[match.end() :]
+
+    rest = LEADING_VERB.sub("", rest)
+    description = " ".join(re.split(r"[\s,;:]+", rest)).strip()
+    description = CONNECTOR.sub("", description).strip()
+    description = CONNECTOR.sub("", description).strip()
+    if (
+        not description
+        or GIVE_UP.search(description)
+        or len(description.split()) > MAX_DESCRIPTION_WORDS
+        or amount <= 0
+    ):
+        return None
+
+    if spending_type:
+        spending_type = spending_type.lower().rstrip("s") + "s"
+    return ParsedExpense(
+        amount=amount,
+        description=description,
+        category=category or None,
+        budget=budget or None,
+        date_spent=date_spent,
+        spending_type=spending_type,
+    )
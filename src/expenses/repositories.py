@@ -1,22 +1,602 @@
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+import base64
+import json
+from collections import defaultdict
+from datetime import date, datetime
+from types import SimpleNamespace
+from typing import Iterable, Optional
 
+from sqlalchemy import (
+    Date,
+    and_,
+    case,
+    delete,
+    func,
+    insert,
+    literal,
+    literal_column,
+    or_,
+    select,
+    union_all,
+    update,
+)
+
+from src.budgets.models import Budget
+from src.budgets.repositories import BudgetRepository
+from src.categories.classifier import term_changes
+from src.categories.models import Category
+from src.categories.repositories import CategoryTermRepository
 from src.expenses.schemas import ExpenseIn
-from src.expenses.models import Expense
+from src.expenses.models import UNDATED_MONTH, Expense, ExpenseMonthlyRollup
+from src.repositories import BaseRepository
+
+MAX_PAGE_SIZE = 100
+
+SUMMARY_DIMENSIONS = ("category", "budget", "spending_type", "day", "week", "month")
+
+# Dimensions ExpenseMonthlyRollup can group by
+ROLLUP_DIMENSIONS = ("category", "budget", "month")
+
+LIST_COLUMNS = (
+    Expense.id,
+    Expense.description,
+    Expense.amount,
+    Expense.spending_type,
+    Expense.date_spent,
+    Expense.category_id,
+    Expense.budget_id,
+)
+
+# What a write needs to know to update budgets and rollups
+WRITE_COLUMNS = (*LIST_COLUMNS, Expense.user_id)
+
+# Column order of the rows loaded by ExpenseRepository.copy_expenses
+COPY_COLUMNS = (
+    "description",
+    "amount",
+    "spending_type",
+    "date_spent",
+    "category_id",
+    "budget_id",
+    "user_id",
+    "created_at",
+    "updated_at",
+)
+
+
+def encode_cursor(date_spent: Optional[datetime], expense_id: int) -> str:
+    payload = [date_spent.isoformat() if date_spent else None, expense_id]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[Optional[datetime], int]:
+    try:
+        date_spent, expense_id = json.loads(base64.urlsafe_b64decode(cursor))
+        return (datetime.fromisoformat(date_spent) if date_spent else None), int(expense_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def date_bucket(dialect: str, unit: str, column=Expense.date_spent):
+    """SQL expression truncating ``column`` to the start of its day, week or month."""
+    if dialect == "postgresql":
+        # Inline the unit so SELECT and GROUP BY render the identical expression
+        return func.date(func.date_trunc(literal_column(f"'{unit}'"), column))
+    if unit == "month":
+        return func.strftime("%Y-%m-01", column)
+    if unit == "week":
+        return func.date(column, "weekday 0", "-6 days")
+    return func.date(column)
+
+
+def is_month_start(value: Optional[datetime]) -> bool:
+    return value is None or (value.day == 1 and value.time() == datetime.min.time())
+
+
+def undated_month():
+    # Inlined, like date_bucket's unit, so it is identical in SELECT and GROUP BY
+    return literal(UNDATED_MONTH, Date, literal_execute=True)
 
 
-class ExpenseRepository:
-    def __init__(self, session: AsyncSession):
-        self.session = session
+def rollup_change(expense, sign: int = 1) -> tuple[tuple, float, int]:
+    """The ExpenseMonthlyRollup key of an expense row and what it adds to it."""
+    spent = expense.date_spent
+    key = (
+        expense.user_id,
+        date(spent.year, spent.month, 1) if spent else UNDATED_MONTH,
+        expense.category_id or 0,
+        expense.budget_id or 0,
+    )
+    return key, sign * expense.amount, sign
+
+
+def apply_filters(
+    stmt,
+    user_id: int,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    category_id: Optional[int] = None,
+    budget_id: Optional[int] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+):
+    stmt = stmt.where(Expense.user_id == user_id)
+    if date_from:
+        stmt = stmt.where(Expense.date_spent >= date_from)
+    if date_to:
+        stmt = stmt.where(Expense.date_spent < date_to)
+    if category_id is not None:
+        stmt = stmt.where(Expense.category_id == category_id)
+    if budget_id is not None:
+        stmt = stmt.where(Expense.budget_id == budget_id)
+    if min_amount is not None:
+        stmt = stmt.where(Expense.amount >= min_amount)
+    if max_amount is not None:
+        stmt = stmt.where(Expense.amount <= max_amount)
+    return stmt
+
+
+class ExpenseRepository(BaseRepository):
+    model = Expense
+
+    @property
+    def budgets(self) -> BudgetRepository:
+        return BudgetRepository(self.session)
+
+    @property
+    def rollups(self) -> "ExpenseRollupRepository":
+        return ExpenseRollupRepository(self.session)
+
+    @property
+    def category_terms(self) -> CategoryTermRepository:
+        return CategoryTermRepository(self.session)
+
+    async def _apply_writes(self, added=(), removed=()):
+        """Update budget balances, monthly rollups and category terms for inserted and deleted rows."""
+        await self.budgets.add_to_balances(
+            [(row.user_id, row.budget_id, row.amount) for row in added]
+            + [(row.user_id, row.budget_id, -row.amount) for row in removed]
+        )
+        await self.rollups.add(
+            [rollup_change(row) for row in added]
+            + [rollup_change(row, sign=-1) for row in removed]
+        )
+        await self.category_terms.add(
+            [change for row in added for change in term_changes(row)]
+            + [change for row in removed for change in term_changes(row, sign=-1)]
+        )
+
+    async def check_budgets(self, user_id: int, budget_ids: Iterable[Optional[int]]):
+        """Raise ValueError unless every given budget belongs to ``user_id``."""
+        wanted = {budget_id for budget_id in budget_ids if budget_id is not None}
+        missing = wanted - await self.budgets.owned_budget_ids(user_id, wanted)
+        if missing:
+            raise ValueError(f"Budget {min(missing)} not found")
 
     async def create_expense(self, expense_data: ExpenseIn):
-        expense = Expense(**expense_data.model_dump())
-        self.session.add(expense)
-        await self.session.commit()
-        await self.session.refresh(expense)
+        """Insert an expense; raises ValueError if its budget is not the user's."""
+        await self.check_budgets(expense_data.user_id, [expense_data.budget_id])
+        expense = await self.insert_returning(expense_data.model_dump(), commit=False)
+        await self._apply_writes(added=[expense])
+        await self.commit()
         return expense
 
-    async def list_expenses(self, user_id: int):
-        stmt = select(Expense).where(Expense.user_id == user_id)
+    async def create_expenses(self, expenses: list[ExpenseIn]):
+        """Insert ``expenses`` with one multi-row INSERT ... RETURNING.
+
+        Returns the new rows in input order. Raises ValueError if a budget is
+        not the user's.
+        """
+        by_user = defaultdict(set)
+        for e in expenses:
+            by_user[e.user_id].add(e.budget_id)
+        for user_id, budget_ids in by_user.items():
+            await self.check_budgets(user_id, budget_ids)
+        rows = await self.insert_many_returning(
+            [e.model_dump() for e in expenses], columns=WRITE_COLUMNS, commit=False
+        )
+        await self._apply_writes(added=rows)
+        await self.commit()
+        return rows
+
+    async def update_expense(self, expense_id: int, user_id: int, changes: dict):
+        """Apply ``changes`` to an expense and move its amount between budgets.
+
+        Returns the updated row, or None if the user has no such expense.
+        Raises ValueError if the new budget is not the user's.
+        """
+        if "budget_id" in changes:
+            await self.check_budgets(user_id, [changes["budget_id"]])
+        stmt = (
+            select(*WRITE_COLUMNS)
+            .where(Expense.id == expense_id, Expense.user_id == user_id)
+            .with_for_update()
+        )
+        before = (await self.session.execute(stmt)).one_or_none()
+        if before is None:
+            return None
+
+        table = Expense.__table__
+        stmt = (
+            update(table)
+            .where(table.c.id == expense_id)
+            .values(**changes)
+            .returning(*WRITE_COLUMNS)
+        )
+        after = (await self.session.execute(stmt)).one()
+        await self._apply_writes(added=[after], removed=[before])
+        await self.commit()
+        return after
+
+    async def delete_expense(self, expense_id: int, user_id: int):
+        """Delete an expense and take its amount off its budget.
+
+        Returns the deleted row, or None if the user has no such expense.
+        """
+        table = Expense.__table__
+        stmt = (
+            delete(table)
+            .where(table.c.id == expense_id, table.c.user_id == user_id)
+            .returning(*WRITE_COLUMNS)
+        )
+        deleted = (await self.session.execute(stmt)).one_or_none()
+        if deleted is None:
+            return None
+
+        await self._apply_writes(removed=[deleted])
+        await self.commit()
+        return deleted
+
+    async def resolve_references(
+        self,
+        user_id: int,
+        category_refs: set[int | str],
+        budget_refs: set[int | str],
+    ) -> tuple[dict[int | str, int], dict[int | str, int]]:
+        """Resolve category and budget IDs and names of ``user_id`` in one query.
+
+        ``*_refs`` mix IDs and lower-cased names. Each returned dict maps every
+        ref that belongs to the user to its ID; name matching is exact and
+        case-insensitive, and the oldest row wins on duplicate names.
+        """
+        queries = []
+        for kind, model, refs in (
+            ("category", Category, category_refs),
+            ("budget", Budget, budget_refs),
+        ):
+            ids = {ref for ref in refs if isinstance(ref, int)}
+            names = refs - ids
+            if not refs:
+                continue
+            queries.append(
+                select(
+                    literal(kind).label("kind"),
+                    model.id,
+                    func.lower(model.name).label("name"),
+                ).where(
+                    model.user_id == user_id,
+                    or_(model.id.in_(ids), func.lower(model.name).in_(names)),
+                )
+            )
+
+        categories, budgets = {}, {}
+        if not queries:
+            return categories, budgets
+
+        stmt = union_all(*queries) if len(queries) > 1 else queries[0]
+        result = await self.session.execute(stmt.order_by(literal_column("id")))
+        for kind, id, name in result:
+            resolved = categories if kind == "category" else budgets
+            resolved[id] = id
+            resolved.setdefault(name, id)
+        return categories, budgets
+
+    async def copy_expenses(self, expenses: list[ExpenseIn]) -> int:
+        """Bulk load ``expenses`` in the session's transaction without committing.
+
+        Uses COPY on asyncpg and a single executemany INSERT elsewhere, then
+        updates budget balances and monthly rollups.
+        """
+        if not expenses:
+            return 0
+
+        now = datetime.now()
+        records = [
+            (
+                e.description,
+                e.amount,
+                e.spending_type,
+                e.date_spent,
+                e.category_id,
+                e.budget_id,
+                e.user_id,
+                now,
+                now,
+            )
+            for e in expenses
+        ]
+
+        connection = await self.session.connection()
+        if connection.dialect.driver != "asyncpg":
+            await self.session.execute(
+                insert(Expense), [dict(zip(COPY_COLUMNS, r)) for r in records]
+            )
+        else:
+            raw = await connection.get_raw_connection()
+            driver = raw.driver_connection
+            if not driver.is_in_transaction():
+                # The adapter opens its transaction lazily on the first statement;
+                # COPY goes straight to asyncpg and would otherwise autocommit.
+                await connection.exec_driver_sql("SELECT 1")
+            await driver.copy_records_to_table(
+                Expense.__tablename__, records=records, columns=COPY_COLUMNS
+            )
+
+        await self._apply_writes(
+            added=[SimpleNamespace(**dict(zip(COPY_COLUMNS, r))) for r in records]
+        )
+        return len(records)
+
+    async def list_expenses(
+        self,
+        user_id: int,
+        *,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        category_id: Optional[int] = None,
+        budget_id: Optional[int] = None,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+        cursor: Optional[str] = None,
+        limit: int = MAX_PAGE_SIZE,
+    ):
+        """Return one page of expenses, newest first, and the cursor of the next page.
+
+        Pages are keyed on ``(date_spent, id)``, so each page is a single index
+        range scan however deep the user pages. Expenses without a date sort last.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        stmt = apply_filters(
+            select(*LIST_COLUMNS),
+            user_id,
+            date_from=date_from,
+            date_to=date_to,
+            category_id=category_id,
+            budget_id=budget_id,
+            min_amount=min_amount,
+            max_amount=max_amount,
+        )
+
+        if cursor:
+            after_date, after_id = decode_cursor(cursor)
+            if after_date is None:
+                stmt = stmt.where(Expense.date_spent.is_(None), Expense.id < after_id)
+            else:
+                stmt = stmt.where(
+                    or_(
+                        Expense.date_spent < after_date,
+                        and_(Expense.date_spent == after_date, Expense.id < after_id),
+                        Expense.date_spent.is_(None),
+                    )
+                )
+
+        stmt = stmt.order_by(
+            Expense.date_spent.desc().nulls_last(), Expense.id.desc()
+        ).limit(limit + 1)
+        result = await self.session.execute(stmt)
+        rows = result.all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].date_spent, rows[-1].id)
+        return rows, next_cursor
+
+    async def summarize_expenses(
+        self,
+        user_id: int,
+        group_by: list[str],
+        *,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        category_id: Optional[int] = None,
+        budget_id: Optional[int] = None,
+    ):
+        """Total, count and average amount per group, computed in SQL.
+
+        ``group_by`` takes any of SUMMARY_DIMENSIONS; an empty list gives one
+        grand-total row. Category and budget groups are reported by name.
+        Summaries by category, budget and month over whole months are read
+        from the monthly rollups instead of scanning expenses.
+        """
+        unknown = set(group_by) - set(SUMMARY_DIMENSIONS)
+        if unknown:
+            raise ValueError(f"Cannot group by {', '.join(sorted(unknown))}")
+
+        whole_months = is_month_start(date_from) and is_month_start(date_to)
+        if whole_months and set(group_by) <= set(ROLLUP_DIMENSIONS):
+            return await self.rollups.summarize(
+                user_id,
+                group_by,
+                date_from=date_from,
+                date_to=date_to,
+                category_id=category_id,
+                budget_id=budget_id,
+            )
+
+        dialect = self.session.get_bind().dialect.name
+        keys = []
+        for dimension in group_by:
+            if dimension == "category":
+                keys.append(Category.name.label("category"))
+            elif dimension == "budget":
+                keys.append(Budget.name.label("budget"))
+            elif dimension == "spending_type":
+                keys.append(Expense.spending_type.label("spending_type"))
+            else:
+                keys.append(date_bucket(dialect, dimension).label(dimension))
+
+        stmt = select(
+            *keys,
+            func.sum(Expense.amount).label("total"),
+            func.count(Expense.id).label("count"),
+            func.avg(Expense.amount).label("average"),
+        ).select_from(Expense)
+        if "category" in group_by:
+            stmt = stmt.outerjoin(Category, Category.id == Expense.category_id)
+        if "budget" in group_by:
+            stmt = stmt.outerjoin(Budget, Budget.id == Expense.budget_id)
+
+        stmt = apply_filters(
+            stmt,
+            user_id,
+            date_from=date_from,
+            date_to=date_to,
+            category_id=category_id,
+            budget_id=budget_id,
+        )
+        if keys:
+            stmt = stmt.group_by(*keys).order_by(*keys)
+        result = await self.session.execute(stmt)
+        return result.all()
+
+    async def top_expenses(
+        self,
+        user_id: int,
+        limit: int = 5,
+        *,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        category_id: Optional[int] = None,
+        budget_id: Optional[int] = None,
+    ):
+        """The ``limit`` largest expenses matching the filters."""
+        stmt = apply_filters(
+            select(*LIST_COLUMNS),
+            user_id,
+            date_from=date_from,
+            date_to=date_to,
+            category_id=category_id,
+            budget_id=budget_id,
+        )
+        stmt = stmt.order_by(Expense.amount.desc(), Expense.id.desc()).limit(
+            max(1, min(limit, MAX_PAGE_SIZE))
+        )
+        result = await self.session.execute(stmt)
+        return result.all()
+
+
+class ExpenseRollupRepository(BaseRepository):
+    """Per-user monthly totals kept in step with the expenses table."""
+
+    model = ExpenseMonthlyRollup
+
+    async def add(self, changes: Iterable[tuple[tuple, float, int]]):
+        """Add ``(key, amount, count)`` changes to their rollup rows, creating them.
+
+        Runs in the caller's transaction without committing.
+        """
+        totals = defaultdict(lambda: [0.0, 0])
+        for key, amount, count in changes:
+            totals[key][0] += amount
+            totals[key][1] += count
+        params = [
+            {
+                "user_id": user_id,
+                "month": month,
+                "category_id": category_id,
+                "budget_id": budget_id,
+                "total": total,
+                "count": count,
+            }
+            for (user_id, month, category_id, budget_id), (total, count) in sorted(
+                totals.items()
+            )
+            if total or count
+        ]
+        await self.upsert_add(params, ["total", "count"])
+
+    async def rebuild(self, user_id: Optional[int] = None) -> int:
+        """Recompute the rollups from the expenses table; returns the rows written."""
+        table = ExpenseMonthlyRollup.__table__
+        dialect = self.session.get_bind().dialect.name
+        month = func.coalesce(date_bucket(dialect, "month"), undated_month())
+        keys = (
+            Expense.user_id,
+            month,
+            func.coalesce(Expense.category_id, 0),
+            func.coalesce(Expense.budget_id, 0),
+        )
+        source = select(*keys, func.sum(Expense.amount), func.count(Expense.id)).group_by(
+            *keys
+        )
+
+        clear = delete(table)
+        if user_id is not None:
+            clear = clear.where(table.c.user_id == user_id)
+            source = source.where(Expense.user_id == user_id)
+        await self.session.execute(clear)
+        result = await self.session.execute(
+            insert(table).from_select(
+                ["user_id", "month", "category_id", "budget_id", "total", "count"], source
+            )
+        )
+        await self.commit()
+        return result.rowcount
+
+    async def summarize(
+        self,
+        user_id: int,
+        group_by: list[str],
+        *,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        category_id: Optional[int] = None,
+        budget_id: Optional[int] = None,
+    ):
+        """ExpenseRepository.summarize_expenses over whole months, from the rollups.
+
+        ``group_by`` takes any of ROLLUP_DIMENSIONS and the dates must be the
+        first of a month; the rows have the same shape as the expense scan.
+        """
+        rollup = ExpenseMonthlyRollup
+        keys = []
+        for dimension in group_by:
+            if dimension == "category":
+                keys.append(Category.name.label("category"))
+            elif dimension == "budget":
+                keys.append(Budget.name.label("budget"))
+            else:
+                keys.append(
+                    case((rollup.month == undated_month(), None), else_=rollup.month).label(
+                        "month"
+                    )
+                )
+
+        total = func.sum(rollup.total)
+        count = func.coalesce(func.sum(rollup.count), 0)
+        stmt = select(
+            *keys,
+            total.label("total"),
+            count.label("count"),
+            (total / func.nullif(count, 0)).label("average"),
+        ).select_from(rollup)
+        if "category" in group_by:
+            stmt = stmt.outerjoin(Category, Category.id == rollup.category_id)
+        if "budget" in group_by:
+            stmt = stmt.outerjoin(Budget, Budget.id == rollup.budget_id)
+
+        stmt = stmt.where(rollup.user_id == user_id, rollup.count > 0)
+        if date_from or date_to:
+            stmt = stmt.where(rollup.month != UNDATED_MONTH)
+        if date_from:
+            stmt = stmt.where(rollup.month >= date_from.date())
+        if date_to:
+            stmt = stmt.where(rollup.month < date_to.date())
+        if category_id is not None:
+            stmt = stmt.where(rollup.category_id == category_id)
+        if budget_id is not None:
+            stmt = stmt.where(rollup.budget_id == budget_id)
+        if keys:
+            stmt = stmt.group_by(*keys).order_by(*keys)
         result = await self.session.execute(stmt)
-        return result.scalars().all()
+        return result.all()
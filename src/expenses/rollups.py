@@ -0,0 +1,31 @@
+"""Rebuild the monthly expense rollups from the expenses table.
+
+Every expense write keeps ``expense_monthly_rollups`` up to date; run this
+to backfill them or to repair them after writes that bypassed the
+repositories:
+
+    python -m src.expenses.rollups [--user-id 1]
+"""
+
+import logging
+from typing import Optional
+
+# Register the mappers Expense's relationships refer to
+import src.categories.models  # noqa: F401
+from src.expenses.repositories import ExpenseRollupRepository
+from src.maintenance import run_cli, run_in_session
+
+logger = logging.getLogger(__name__)
+
+
+async def rebuild(user_id: Optional[int] = None) -> int:
+    rows = await run_in_session(
+        lambda session: ExpenseRollupRepository(session).rebuild(user_id)
+    )
+
+    logger.info("Rebuilt expense rollups, %d rows", rows)
+    return rows
+
+
+if __name__ == "__main__":
+    run_cli(__doc__, rebuild, "only this user's rollups")
@@ -1,9 +1,86 @@
-from fastapi import APIRouter, Depends
-from fastapi.responses import StreamingResponse
+import logging
+import uuid
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from starlette.requests import ClientDisconnect
 
 from src.expenses.dependencies import get_expense_service
+from src.expenses.importer import imports, start_import
 from src.expenses.service import ExpenseService
-from src.expenses.schemas import ExpenseChatIn
+
+logger = logging.getLogger(__name__)
 
 expense_router = APIRouter()
 
+CONTENT_TYPE_FORMATS = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "jsonl",
+    "application/jsonl": "jsonl",
+    "application/json-lines": "jsonl",
+}
+
+
+@expense_router.post("/import", status_code=201)
+async def import_expenses(
+    request: Request,
+    format: Optional[Literal["csv", "jsonl"]] = None,
+    import_id: Optional[str] = Query(
+        default=None, description="Client-chosen ID to poll progress while uploading"
+    ),
+    service: ExpenseService = Depends(get_expense_service),
+):
+    """Import expenses from a CSV or JSONL request body.
+
+    The body is parsed as it arrives and loaded in batches, so uploads of any
+    size use constant memory. Poll ``GET /import/{import_id}`` for progress.
+    The response lists the rows that were rejected and why.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    format = format or CONTENT_TYPE_FORMATS.get(content_type)
+    if format is None:
+        raise HTTPException(
+            status_code=415, detail="Send text/csv or application/x-ndjson, or pass ?format="
+        )
+
+    import_id = import_id or uuid.uuid4().hex
+    existing = imports.get(import_id)
+    if existing and (
+        existing.status == "running" or existing.user_id != service.current_user_id
+    ):
+        raise HTTPException(status_code=409, detail="Import ID is already in use")
+
+    progress = start_import(import_id, service.current_user_id)
+    try:
+        await service.import_expenses(request.stream(), format, progress)
+    except ClientDisconnect:
+        progress.finish("cancelled")
+        await service.session.rollback()
+        logger.info("Import %s cancelled after %d rows", import_id, progress.rows)
+        raise
+    except Exception:
+        progress.finish("failed")
+        await service.session.rollback()
+        logger.exception("Import %s failed after %d rows", import_id, progress.rows)
+        raise
+
+    progress.finish("completed")
+    logger.info(
+        "Import %s: %d rows, %d imported, %d failed",
+        import_id,
+        progress.rows,
+        progress.imported,
+        progress.failed,
+    )
+    return progress.to_dict()
+
+
+@expense_router.get("/import/{import_id}")
+async def import_status(
+    import_id: str, service: ExpenseService = Depends(get_expense_service)
+):
+    progress = imports.get(import_id)
+    if progress is None or progress.user_id != service.current_user_id:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return progress.to_dict()
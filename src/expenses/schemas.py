@@ -1,11 +1,12 @@
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel, Field
-from pydantic.v1.class_validators import validator
+from pydantic import BaseModel, Field, ValidationError, field_validator
 
 class ExpenseIn(BaseModel):
 
-    description: str = Field(..., description="Description of the expense")
+    description: str = Field(
+        ..., max_length=255, description="Description of the expense"
+    )
     amount: float = Field(
         ..., description="The amount of the expense in decimal format"
     )
@@ -23,13 +24,15 @@ class ExpenseIn(BaseModel):
     )
     user_id: int = Field(..., description="ID of the user who made the expense")
 
-    @validator("amount")
+    @field_validator("amount")
+    @classmethod
     def validate_amount(cls, v):
         if v <= 0:
             raise ValueError("Amount must be positive")
         return round(v, 2)
 
-    @validator("date_spent", pre=True)
+    @field_validator("date_spent", mode="before")
+    @classmethod
     def parse_date_spent(cls, v):
         if isinstance(v, str):
             try:
@@ -37,3 +40,44 @@ class ExpenseIn(BaseModel):
             except ValueError:
                 raise ValueError("date_spent must be in YYYY-MM-DD format")
         return v
+
+
+class ExpenseItem(BaseModel):
+    """One expense of a create_expenses call, before the user is attached."""
+
+    description: str = Field(..., description="Description of the expense")
+    amount: float = Field(..., description="The monetary amount of the expense")
+    category_id: Optional[int] = Field(
+        default=None, description="The ID of the category"
+    )
+    budget_id: Optional[int] = Field(default=None, description="The ID of the budget")
+    spending_type: Optional[str] = Field(
+        default=None, description="Type of spending (wants, needs, etc.)"
+    )
+    date_spent: Optional[str] = Field(
+        default=None, description="Date in YYYY-MM-DD format, defaults to today"
+    )
+
+
+class ExpenseUpdate(BaseModel):
+    """Fields of an expense to change; unset fields are left as they are."""
+
+    description: Optional[str] = Field(default=None, max_length=255)
+    amount: Optional[float] = None
+    spending_type: Optional[str] = None
+    date_spent: Optional[datetime] = None
+    category_id: Optional[int] = None
+    budget_id: Optional[int] = None
+
+    validate_amount = field_validator("amount")(ExpenseIn.validate_amount.__func__)
+    parse_date_spent = field_validator("date_spent", mode="before")(
+        ExpenseIn.parse_date_spent.__func__
+    )
+
+
+def format_errors(error: ValidationError) -> list[str]:
+    """One ``field: message`` line per validation error."""
+    return [
+        f"{'.'.join(str(part) for part in e['loc']) or 'row'}: {e['msg'].removeprefix('Value error, ')}"
+        for e in error.errors()
+    ]
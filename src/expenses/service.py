@@ -1,10 +1,21 @@
-from langchain.agents import create_agent
-from langchain_openai import ChatOpenAI
+from typing import AsyncIterator
+
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio.session import AsyncSession
 
 from src.config import settings
+from src.expenses.importer import ImportProgress, iter_records
 from src.expenses.repositories import ExpenseRepository
-from src.expenses.tools import ExpenseToolFactory
+from src.expenses.schemas import ExpenseIn, format_errors
+
+EXPENSE_FIELDS = ("description", "amount", "spending_type", "date_spent")
+
+
+def reference(value) -> int | str:
+    """An ID when ``value`` looks like one, else the lower-cased name."""
+    if isinstance(value, int) or (isinstance(value, str) and value.isdigit()):
+        return int(value)
+    return str(value).strip().lower()
 
 
 class ExpenseService:
@@ -12,4 +23,75 @@ class ExpenseService:
 
     def __init__(self, session: AsyncSession, current_user_id: int):
         self.current_user_id = current_user_id
+        self.session = session
         self.repository = ExpenseRepository(session)
+
+    async def import_expenses(
+        self, chunks: AsyncIterator[bytes], format: str, progress: ImportProgress
+    ):
+        """Stream CSV or JSONL rows into the user's expenses.
+
+        Rows are validated and loaded in batches of IMPORT_BATCH_SIZE, one
+        commit per batch, so ``progress`` counts rows that are already stored.
+        A row names its category and budget by ID (``category_id``) or by name
+        (``category``); invalid rows are reported and skipped.
+        """
+        batch = []
+        async for line, record, error in iter_records(chunks, format):
+            progress.rows += 1
+            if error:
+                progress.add_error(line, [error])
+                continue
+            batch.append((line, record))
+            if len(batch) >= settings.IMPORT_BATCH_SIZE:
+                await self._load_batch(batch, progress)
+                batch = []
+        await self._load_batch(batch, progress)
+
+    async def _load_batch(self, batch: list[tuple[int, dict]], progress: ImportProgress):
+        if not batch:
+            return
+
+        refs = []
+        for _, record in batch:
+            category = record.get("category_id") or record.get("category")
+            budget = record.get("budget_id") or record.get("budget")
+            refs.append(
+                (
+                    reference(category) if category is not None else None,
+                    reference(budget) if budget is not None else None,
+                )
+            )
+        categories, budgets = await self.repository.resolve_references(
+            self.current_user_id,
+            {category for category, _ in refs if category is not None},
+            {budget for _, budget in refs if budget is not None},
+        )
+
+        expenses = []
+        for (line, record), (category, budget) in zip(batch, refs):
+            errors = []
+            data = {
+                name: record[name]
+                for name in EXPENSE_FIELDS
+                if record.get(name) is not None
+            }
+            data["category_id"] = categories.get(category)
+            data["budget_id"] = budgets.get(budget)
+            if category is not None and data["category_id"] is None:
+                errors.append(f"category: unknown category {category!r}")
+            if budget is not None and data["budget_id"] is None:
+                errors.append(f"budget: unknown budget {budget!r}")
+            try:
+                expense = ExpenseIn(**data, user_id=self.current_user_id)
+            except ValidationError as e:
+                errors.extend(format_errors(e))
+
+            if errors:
+                progress.add_error(line, errors)
+            else:
+                expenses.append(expense)
+
+        imported = await self.repository.copy_expenses(expenses)
+        await self.session.commit()
+        progress.imported += imported
@@ -1,25 +1,38 @@
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 from langchain.agents.middleware import wrap_tool_call
 from langchain_core.messages import ToolMessage
+from langchain.tools import ToolRuntime
 from langchain_core.tools import StructuredTool
-from sqlalchemy.ext.asyncio.session import AsyncSession
+from pydantic import ValidationError
 
-from src.expenses.schemas import ExpenseIn
+from src.agents.context import AgentContext
+from src.expenses.schemas import ExpenseIn, ExpenseItem, ExpenseUpdate, format_errors
 from src.expenses.repositories import ExpenseRepository
 
+MAX_EXPENSES_PER_CALL = 50
+
+
+def parse_date_range(date_from: Optional[str], date_to: Optional[str]):
+    """Parse optional YYYY-MM-DD bounds; raises ValueError on bad input."""
+    return (
+        datetime.strptime(date_from, "%Y-%m-%d") if date_from else None,
+        datetime.strptime(date_to, "%Y-%m-%d") if date_to else None,
+    )
+
 
 class ExpenseToolFactory:
-    """Factory to create tools with injected dependencies."""
+    """Factory to create tools that read their dependencies from the runtime context."""
 
-    def __init__(self, session: AsyncSession, user_id: int):
-        self.repository = ExpenseRepository(session)
-        self.user_id = user_id
-        
     def all(self):
         return [
             self.create_expense_tool(),
+            self.create_expenses_tool(),
+            self.update_expense_tool(),
+            self.delete_expense_tool(),
             self.list_expenses_tool(),
+            self.summarize_expenses_tool(),
+            self.top_expenses_tool(),
         ]
 
     @wrap_tool_call
@@ -37,6 +50,7 @@ class ExpenseToolFactory:
         """Create create_expense tool with injected dependencies."""
 
         async def create_expense(
+            runtime: ToolRuntime[AgentContext],
             description: str,
             amount: float,
             category_id: Optional[int] = None,
@@ -51,8 +65,8 @@ class ExpenseToolFactory:
                 amount: The monetary amount of the expense
                 spending_type: Type of spending (wants, needs, etc.)
                 date_spent: Date in YYYY-MM-DD format, defaults to today
-                category_id: The ID of the category (use get_category_id first)
-                budget_id: The ID of the budget (use get_budget_id first)
+                category_id: The ID of the category (from the known categories, else get_category_id)
+                budget_id: The ID of the budget (from the known budgets, else get_budget_id)
 
             Returns:
                 Dictionary with the created expense details
@@ -68,17 +82,24 @@ class ExpenseToolFactory:
                         "message": "Invalid date format. Use YYYY-MM-DD",
                     }
 
-            expense_data = ExpenseIn(
-                description=description,
-                amount=amount,
-                spending_type=spending_type,
-                date_spent=parsed_date or datetime.now(),
-                category_id=category_id,
-                budget_id=budget_id,
-                user_id=self.user_id,
-            )
+            try:
+                expense_data = ExpenseIn(
+                    description=description,
+                    amount=amount,
+                    spending_type=spending_type,
+                    date_spent=parsed_date or datetime.now(),
+                    category_id=category_id,
+                    budget_id=budget_id,
+                    user_id=runtime.context.user_id,
+                )
+            except ValidationError as e:
+                return {"status": "error", "message": format_errors(e)[0]}
 
-            expense = await self.repository.create_expense(expense_data)
+            try:
+                async with runtime.context.session() as session:
+                    expense = await ExpenseRepository(session).create_expense(expense_data)
+            except ValueError as e:
+                return {"status": "error", "message": str(e)}
 
             return {
                 "status": "success",
@@ -102,14 +123,218 @@ class ExpenseToolFactory:
             description="Create a new expense record in the database",
         )
 
+    def create_expenses_tool(self) -> StructuredTool:
+        """Create the create_expenses tool for the agent."""
+
+        async def create_expenses(
+            runtime: ToolRuntime[AgentContext],
+            expenses: list[ExpenseItem],
+        ) -> dict:
+            """Create several expense records at once, in a single transaction.
+
+            Args:
+                expenses: The expenses to create, each with description, amount,
+                    category_id, budget_id and optional spending_type and date_spent
+
+            Returns:
+                A table of the created expenses in input order, or the errors of
+                every invalid item, in which case nothing is created
+            """
+            if not expenses:
+                return {"status": "error", "message": "No expenses given"}
+            if len(expenses) > MAX_EXPENSES_PER_CALL:
+                return {
+                    "status": "error",
+                    "message": f"At most {MAX_EXPENSES_PER_CALL} expenses per call",
+                }
+
+            today = datetime.now()
+            valid, errors = [], []
+            for index, item in enumerate(expenses):
+                try:
+                    valid.append(
+                        ExpenseIn(
+                            **item.model_dump(exclude={"date_spent"}),
+                            date_spent=item.date_spent or today,
+                            user_id=runtime.context.user_id,
+                        )
+                    )
+                except ValidationError as e:
+                    errors.append({"index": index, "errors": format_errors(e)})
+            if errors:
+                return {
+                    "status": "error",
+                    "message": "No expenses were created; fix these items and retry",
+                    "errors": errors,
+                }
+
+            try:
+                async with runtime.context.session() as session:
+                    rows = await ExpenseRepository(session).create_expenses(valid)
+            except ValueError as e:
+                return {"status": "error", "message": f"No expenses were created: {e}"}
+            return {
+                "status": "success",
+                "columns": ["id", "description", "amount", "category_id", "budget_id", "date_spent"],
+                "rows": [
+                    [
+                        e.id,
+                        e.description,
+                        float(e.amount),
+                        e.category_id,
+                        e.budget_id,
+                        e.date_spent.date().isoformat() if e.date_spent else None,
+                    ]
+                    for e in rows
+                ],
+            }
+
+        return StructuredTool.from_function(
+            coroutine=create_expenses,
+            name="create_expenses",
+            description=(
+                "Create several expenses in one step, e.g. when the user lists more than one expense "
+                "in a message. All items are validated first; either every expense is created or none."
+            ),
+        )
+
+    def update_expense_tool(self) -> StructuredTool:
+        """Create the update_expense tool for the agent."""
+
+        async def update_expense(
+            runtime: ToolRuntime[AgentContext],
+            expense_id: int,
+            description: Optional[str] = None,
+            amount: Optional[float] = None,
+            category_id: Optional[int] = None,
+            budget_id: Optional[int] = None,
+            spending_type: Optional[str] = None,
+            date_spent: Optional[str] = None,
+        ) -> dict:
+            """Change fields of an existing expense; fields left out stay unchanged.
+
+            Args:
+                expense_id: The ID of the expense to change
+                description: New description
+                amount: New amount
+                category_id: New category ID
+                budget_id: New budget ID
+                spending_type: New type of spending (wants, needs, etc.)
+                date_spent: New date in YYYY-MM-DD format
+
+            Returns:
+                Dictionary with the updated expense
+            """
+            given = {
+                "description": description,
+                "amount": amount,
+                "category_id": category_id,
+                "budget_id": budget_id,
+                "spending_type": spending_type,
+                "date_spent": date_spent,
+            }
+            try:
+                changes = ExpenseUpdate(
+                    **{name: value for name, value in given.items() if value is not None}
+                ).model_dump(exclude_unset=True)
+            except ValidationError as e:
+                return {"status": "error", "message": format_errors(e)[0]}
+            if not changes:
+                return {"status": "error", "message": "Nothing to change"}
+
+            try:
+                async with runtime.context.session() as session:
+                    expense = await ExpenseRepository(session).update_expense(
+                        expense_id, runtime.context.user_id, changes
+                    )
+            except ValueError as e:
+                return {"status": "error", "message": str(e)}
+            if expense is None:
+                return {"status": "error", "message": f"Expense {expense_id} not found"}
+
+            return {
+                "status": "success",
+                "expense": {
+                    "id": expense.id,
+                    "description": expense.description,
+                    "amount": float(expense.amount),
+                    "category_id": expense.category_id,
+                    "budget_id": expense.budget_id,
+                    "spending_type": expense.spending_type,
+                    "date_spent": (
+                        expense.date_spent.isoformat() if expense.date_spent else None
+                    ),
+                },
+            }
+
+        return StructuredTool.from_function(
+            coroutine=update_expense,
+            name="update_expense",
+            description="Change the description, amount, category, budget, spending type or date of an expense",
+        )
+
+    def delete_expense_tool(self) -> StructuredTool:
+        """Create the delete_expense tool for the agent."""
+
+        async def delete_expense(runtime: ToolRuntime[AgentContext], expense_id: int) -> dict:
+            """Delete an expense of the current user.
+
+            Args:
+                expense_id: The ID of the expense to delete
+
+            Returns:
+                Dictionary with the ID, description and amount of the deleted expense
+            """
+            async with runtime.context.session() as session:
+                expense = await ExpenseRepository(session).delete_expense(
+                    expense_id, runtime.context.user_id
+                )
+            if expense is None:
+                return {"status": "error", "message": f"Expense {expense_id} not found"}
+
+            return {
+                "status": "success",
+                "deleted": {
+                    "id": expense.id,
+                    "description": expense.description,
+                    "amount": float(expense.amount),
+                },
+            }
+
+        return StructuredTool.from_function(
+            coroutine=delete_expense,
+            name="delete_expense",
+            description="Delete an expense by ID",
+        )
+
     def list_expenses_tool(self):
         """Create the list_expenses tool for the agent."""
 
-        async def list_expenses():
+        async def list_expenses(
+            runtime: ToolRuntime[AgentContext],
+            date_from: Optional[str] = None,
+            date_to: Optional[str] = None,
+            category_id: Optional[int] = None,
+            budget_id: Optional[int] = None,
+            min_amount: Optional[float] = None,
+            max_amount: Optional[float] = None,
+            cursor: Optional[str] = None,
+            limit: int = 20,
+        ):
             """
-            This tool allows the agent to retrieve all expenses for the current user in the system.
+            This tool allows the agent to retrieve the current user's expenses, newest first, one page at a time.
 
-            Returns a list of expense records, each containing:
+            Args:
+                date_from: Only expenses on or after this date (YYYY-MM-DD)
+                date_to: Only expenses before this date (YYYY-MM-DD, exclusive)
+                category_id: Only expenses in this category
+                budget_id: Only expenses assigned to this budget
+                min_amount: Only expenses of at least this amount
+                max_amount: Only expenses of at most this amount
+                cursor: next_cursor from the previous call, to fetch the following page
+                limit: Page size (max 100)
+
+            Returns a page of expense records, each containing:
                 - id: the unique ID of the expense
                 - description: what the expense is for
                 - amount: amount spent (as float)
@@ -118,9 +343,31 @@ class ExpenseToolFactory:
                 - date_spent: ISO8601 date string or None if not set
 
             Returns:
-               The detailed list of all expenses
+               The page of expenses and next_cursor, which is null on the last page
             """
-            expenses = await self.repository.list_expenses(self.user_id)
+            try:
+                parsed_from, parsed_to = parse_date_range(date_from, date_to)
+            except ValueError:
+                return {
+                    "status": "error",
+                    "message": "Invalid date format. Use YYYY-MM-DD",
+                }
+
+            try:
+                async with runtime.context.session() as session:
+                    expenses, next_cursor = await ExpenseRepository(session).list_expenses(
+                        runtime.context.user_id,
+                        date_from=parsed_from,
+                        date_to=parsed_to,
+                        category_id=category_id,
+                        budget_id=budget_id,
+                        min_amount=min_amount,
+                        max_amount=max_amount,
+                        cursor=cursor,
+                        limit=limit,
+                    )
+            except ValueError as e:
+                return {"status": "error", "message": str(e)}
             return {
                 "status": "success",
                 "data": [
@@ -136,10 +383,146 @@ class ExpenseToolFactory:
                     }
                     for e in expenses
                 ],
+                "next_cursor": next_cursor,
             }
 
         return StructuredTool.from_function(
             coroutine=list_expenses,
             name="list_expenses",
-            description="Retrieve all expense records for the current user. Each record includes: id, description, amount, category_id, budget_id, and date_spent (ISO8601).",
+            description=(
+                "Retrieve the current user's expenses, newest first, filtered by date range, category, budget or amount. "
+                "Each record includes: id, description, amount, category_id, budget_id, and date_spent (ISO8601). "
+                "Returns at most `limit` records; pass next_cursor back as `cursor` to get the next page."
+            ),
+        )
+
+    def summarize_expenses_tool(self):
+        """Create the summarize_expenses tool for the agent."""
+
+        async def summarize_expenses(
+            runtime: ToolRuntime[AgentContext],
+            group_by: Optional[
+                list[Literal["category", "budget", "spending_type", "day", "week", "month"]]
+            ] = None,
+            date_from: Optional[str] = None,
+            date_to: Optional[str] = None,
+            category_id: Optional[int] = None,
+            budget_id: Optional[int] = None,
+        ):
+            """
+            Sum, count and average the current user's expenses in the database, optionally grouped.
+
+            Args:
+                group_by: Dimensions to group by, any of category, budget, spending_type, day, week, month. Empty for one total.
+                date_from: Only expenses on or after this date (YYYY-MM-DD)
+                date_to: Only expenses before this date (YYYY-MM-DD, exclusive)
+                category_id: Only expenses in this category
+                budget_id: Only expenses assigned to this budget
+
+            Returns:
+               A table with one row per group: the group keys, total, count and average
+            """
+            try:
+                parsed_from, parsed_to = parse_date_range(date_from, date_to)
+            except ValueError:
+                return {
+                    "status": "error",
+                    "message": "Invalid date format. Use YYYY-MM-DD",
+                }
+
+            group_by = group_by or []
+            async with runtime.context.session() as session:
+                rows = await ExpenseRepository(session).summarize_expenses(
+                    runtime.context.user_id,
+                    group_by,
+                    date_from=parsed_from,
+                    date_to=parsed_to,
+                    category_id=category_id,
+                    budget_id=budget_id,
+                )
+            return {
+                "status": "success",
+                "columns": [*group_by, "total", "count", "average"],
+                "rows": [
+                    [
+                        *(str(key) if key is not None else None for key in row[: len(group_by)]),
+                        round(float(row.total or 0), 2),
+                        row.count,
+                        round(float(row.average or 0), 2),
+                    ]
+                    for row in rows
+                ],
+            }
+
+        return StructuredTool.from_function(
+            coroutine=summarize_expenses,
+            name="summarize_expenses",
+            description=(
+                "Compute spending totals in the database: sum, count and average of expenses, "
+                "optionally grouped by category, budget, spending_type and/or day/week/month, "
+                "filtered by date range, category or budget. Use this instead of adding up list_expenses results."
+            ),
+        )
+
+    def top_expenses_tool(self):
+        """Create the top_expenses tool for the agent."""
+
+        async def top_expenses(
+            runtime: ToolRuntime[AgentContext],
+            limit: int = 5,
+            date_from: Optional[str] = None,
+            date_to: Optional[str] = None,
+            category_id: Optional[int] = None,
+            budget_id: Optional[int] = None,
+        ):
+            """
+            Return the current user's largest expenses.
+
+            Args:
+                limit: How many expenses to return (max 100)
+                date_from: Only expenses on or after this date (YYYY-MM-DD)
+                date_to: Only expenses before this date (YYYY-MM-DD, exclusive)
+                category_id: Only expenses in this category
+                budget_id: Only expenses assigned to this budget
+
+            Returns:
+               A table of the largest expenses, biggest first
+            """
+            try:
+                parsed_from, parsed_to = parse_date_range(date_from, date_to)
+            except ValueError:
+                return {
+                    "status": "error",
+                    "message": "Invalid date format. Use YYYY-MM-DD",
+                }
+
+            async with runtime.context.session() as session:
+                rows = await ExpenseRepository(session).top_expenses(
+                    runtime.context.user_id,
+                    limit,
+                    date_from=parsed_from,
+                    date_to=parsed_to,
+                    category_id=category_id,
+                    budget_id=budget_id,
+                )
+            return {
+                "status": "success",
+                "columns": ["id", "description", "amount", "category_id", "budget_id", "date_spent"],
+                "rows": [
+                    [
+                        e.id,
+                        e.description,
+                        float(e.amount),
+                        e.category_id,
+                        e.budget_id,
+                        e.date_spent.date().isoformat() if e.date_spent else None,
+                    ]
+                    for e in rows
+                ],
+            }
+
+        return StructuredTool.from_function(
+            coroutine=top_expenses,
+            name="top_expenses",
+            description="Get the N largest expenses of the current user, optionally filtered by date range, category or budget.",
         )
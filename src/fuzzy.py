@@ -0,0 +1,103 @@
+import re
+from collections import defaultdict
+from typing import Hashable, Iterable
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Same default as pg_trgm.similarity_threshold
+SIMILARITY_THRESHOLD = 0.3
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def trigrams(text: str) -> set[str]:
+    """Trigrams of ``text`` the way pg_trgm extracts them."""
+    grams = set()
+    for word in _WORD.findall(text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a: str, b: str) -> float:
+    ga, gb = trigrams(a), trigrams(b)
+    if not ga or not gb:
+        return 0.0
+    shared = len(ga & gb)
+    return shared / (len(ga) + len(gb) - shared)
+
+
+class NgramIndex:
+    """In-memory trigram index, used where pg_trgm is not available."""
+
+    def __init__(self, items: Iterable[tuple[Hashable, str]] = ()):
+        self.names: dict[Hashable, str] = {}
+        self.grams: dict[Hashable, set[str]] = {}
+        self.postings: dict[str, set[Hashable]] = defaultdict(set)
+        for key, name in items:
+            self.add(key, name)
+
+    def add(self, key: Hashable, name: str):
+        self.names[key] = name
+        self.grams[key] = trigrams(name)
+        for gram in self.grams[key]:
+            self.postings[gram].add(key)
+
+    def search(
+        self, query: str, limit: int = 5, threshold: float = SIMILARITY_THRESHOLD
+    ) -> list[tuple[Hashable, float]]:
+        """Top ``limit`` keys by trigram similarity; substring matches always qualify."""
+        query_grams = trigrams(query)
+        shared: dict[Hashable, int] = defaultdict(int)
+        for gram in query_grams:
+            for key in self.postings.get(gram, ()):
+                shared[key] += 1
+
+        needle = query.lower()
+        results = []
+        for key, name in self.names.items():
+            common = shared.get(key, 0)
+            union = len(query_grams) + len(self.grams[key]) - common
+            score = common / union if union else 0.0
+            if score >= threshold or needle in name.lower():
+                results.append((key, score))
+
+        results.sort(key=lambda r: (-r[1], len(self.names[r[0]])))
+        return results[:limit]
+
+
+async def search_by_name(
+    session: AsyncSession,
+    model,
+    name: str,
+    user_id: int,
+    limit: int = 5,
+    threshold: float = SIMILARITY_THRESHOLD,
+) -> list[tuple]:
+    """Rank ``model`` rows of ``user_id`` by name similarity, best first.
+
+    Returns ``(row, score)`` pairs. Postgres uses the pg_trgm GIN index on
+    ``(user_id, name)`` and its ``%`` operator, which applies the server's
+    ``pg_trgm.similarity_threshold``; other databases fall back to
+    ``NgramIndex`` with ``threshold``.
+    """
+    columns = model.__table__.columns
+    if session.get_bind().dialect.name != "postgresql":
+        result = await session.execute(select(*columns).where(model.user_id == user_id))
+        rows = {row.id: row for row in result}
+        index = NgramIndex((row.id, row.name) for row in rows.values())
+        return [(rows[id], score) for id, score in index.search(name, limit, threshold)]
+
+    score = func.similarity(model.name, name).label("score")
+    stmt = (
+        select(*columns, score)
+        .where(
+            model.user_id == user_id,
+            or_(model.name.op("%")(name), model.name.ilike(f"%{name}%")),
+        )
+        .order_by(score.desc(), func.length(model.name))
+        .limit(limit)
+    )
+    result = await session.execute(stmt)
+    return [(row, row.score) for row in result]
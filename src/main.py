@@ -1,14 +1,32 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
+from src.agents.agent import Agent
 from src.agents.router import agent_router
 from src.database import Database
+from src.expenses.router import expense_router
 from src.utils import group
+from src import warmup
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background: /health answers at once, /ready once it is done
+    task = asyncio.create_task(warmup.warm_up())
+    yield
+    task.cancel()
+    with suppress(asyncio.CancelledError):
+        await task
+    await Agent.close()
+    await Database.close()
 
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,16 +36,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    Database.connect()
-    yield
-    await Database.close()
-
 
 api_v1_router = group(
     "/api/v1",
     (agent_router, "/agent", ["Agent"]),
+    (expense_router, "/expenses", ["Expenses"]),
 )
 
 app.include_router(api_v1_router)
@@ -35,3 +48,14 @@ app.include_router(api_v1_router)
 @app.get("/health")
 def health():
     return {"message": "Server is Healthy"}
+
+
+@app.get("/ready")
+def ready():
+    status = warmup.status.to_dict()
+    return JSONResponse(status, status_code=200 if warmup.status.ready else 503)
+
+
+@app.get("/health/pool")
+def pool_health():
+    return Database.pool_stats()
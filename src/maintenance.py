@@ -0,0 +1,36 @@
+"""Shared plumbing of the ``python -m`` maintenance commands.
+
+Each command module (``src.expenses.rollups``, ``src.budgets.reconcile``,
+``src.categories.terms``) defines an ``async def job(user_id)`` around
+``run_in_session`` and hands it to ``run_cli`` under ``__main__``.
+"""
+
+import argparse
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import Database
+
+T = TypeVar("T")
+
+
+async def run_in_session(work: Callable[[AsyncSession], Awaitable[T]]) -> T:
+    """Connect the database, run ``work`` in one session, and close it again."""
+    Database.connect()
+    try:
+        async with Database.async_session() as session:
+            return await work(session)
+    finally:
+        await Database.close()
+
+
+def run_cli(doc: str, job: Callable[[Optional[int]], Awaitable], user_id_help: str):
+    """Parse ``--user-id`` and run ``job`` with it; ``doc``'s first line is the description."""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description=doc.splitlines()[0])
+    parser.add_argument("--user-id", type=int, default=None, help=user_id_help)
+    args = parser.parse_args()
+    asyncio.run(job(args.user_id))
@@ -0,0 +1,103 @@
+from contextlib import asynccontextmanager
+
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.cache import lookup_cache
+
+# session.info keys
+UNIT_OF_WORK = "unit_of_work"
+PENDING_INVALIDATIONS = "pending_invalidations"
+
+
+class BaseRepository:
+    """Shared write path of the per-domain repositories.
+
+    Inserts run as one Core ``INSERT ... RETURNING`` and return plain rows, so
+    a write is a single round trip plus the commit, with no ORM object to
+    track or refresh. Inside ``unit_of_work`` writes are not committed; the
+    unit of work commits them all at once when it ends.
+    """
+
+    model = None
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @property
+    def deferred(self) -> bool:
+        return self.session.info.get(UNIT_OF_WORK, False)
+
+    async def insert_returning(self, values: dict, commit: bool = True):
+        stmt = insert(self.model.__table__).values(**values).returning(
+            *self.model.__table__.columns
+        )
+        result = await self.session.execute(stmt)
+        row = result.one()
+        if commit:
+            await self.commit()
+        return row
+
+    async def insert_many_returning(
+        self, rows: list[dict], columns=None, commit: bool = True
+    ):
+        """Insert ``rows`` as one multi-row INSERT; returns ``columns`` in input order."""
+        stmt = insert(self.model.__table__).returning(
+            *(columns or self.model.__table__.columns), sort_by_parameter_order=True
+        )
+        result = await self.session.execute(stmt, rows)
+        inserted = result.all()
+        if commit:
+            await self.commit()
+        return inserted
+
+    async def upsert_add(self, rows: list[dict], columns: list[str]):
+        """Add ``columns`` of ``rows`` to the rows with their primary key, creating them.
+
+        Runs in the caller's transaction without committing. Pass ``rows``
+        sorted by key so concurrent writers lock rows in the same order.
+        """
+        if not rows:
+            return
+        table = self.model.__table__
+        dialect = sqlite if self.session.get_bind().dialect.name == "sqlite" else postgresql
+        stmt = dialect.insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[c.name for c in table.primary_key],
+            set_={column: table.c[column] + stmt.excluded[column] for column in columns},
+        )
+        await self.session.execute(stmt, rows)
+
+    async def commit(self):
+        if not self.deferred:
+            await self.session.commit()
+
+    def invalidate(self, namespace: str, user_id: int):
+        """Drop cached lookups now and, when deferred, again once committed."""
+        lookup_cache.invalidate(namespace, user_id)
+        if self.deferred:
+            self.session.info.setdefault(PENDING_INVALIDATIONS, set()).add(
+                (namespace, user_id)
+            )
+
+
+async def commit_unit_of_work(session: AsyncSession):
+    await session.commit()
+    for namespace, user_id in session.info.pop(PENDING_INVALIDATIONS, ()):
+        lookup_cache.invalidate(namespace, user_id)
+
+
+@asynccontextmanager
+async def unit_of_work(session: AsyncSession):
+    """Defer the commits of repository writes on ``session`` to one at the end."""
+    session.info[UNIT_OF_WORK] = True
+    try:
+        yield session
+        await commit_unit_of_work(session)
+    except BaseException:
+        await session.rollback()
+        session.info.pop(PENDING_INVALIDATIONS, None)
+        raise
+    finally:
+        session.info.pop(UNIT_OF_WORK, None)
@@ -1,14 +1,26 @@
+from functools import lru_cache
 from fastapi import APIRouter
 from pathlib import Path
 from src.config import settings
 
+PROMPTS_PATH = Path(__file__).parent / "agents" / "prompts"
+
+
+@lru_cache
+def read_prompt(name: str) -> str:
+    return (PROMPTS_PATH / name).read_text()
+
 
 def load_prompt(*filenames):
-    base_path = Path(__file__).parent / "agents" / "prompts"
-    parts = []
-    for name in filenames:
-        parts.append((base_path / name).read_text())
-    return "\n\n".join(parts)
+    return "\n\n".join(read_prompt(name) for name in filenames)
+
+
+def preload_prompts() -> int:
+    """Read every prompt file into the cache; returns how many were read."""
+    names = sorted(path.name for path in PROMPTS_PATH.glob("*.md"))
+    for name in names:
+        read_prompt(name)
+    return len(names)
 
 
 def group(prefix, *routers):
@@ -0,0 +1,77 @@
+"""Startup warm-up, so the first request does not pay for cold caches.
+
+Runs in the background from the app lifespan; ``/ready`` reports it and only
+succeeds once every step is done. Failed steps, e.g. while the database is
+still starting, are retried with exponential backoff until they succeed.
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+from dataclasses import dataclass, field
+
+from src.agents.agent import Agent
+from src.agents.history import get_encoding
+from src.config import settings
+from src.database import Database
+from src.utils import preload_prompts
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WarmUpStatus:
+    ready: bool = False
+    steps: dict[str, float] = field(default_factory=dict)  # milliseconds per step
+    errors: dict[str, str] = field(default_factory=dict)  # of steps still failing
+    attempts: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "ready": self.ready,
+            "steps_ms": self.steps,
+            "errors": self.errors,
+            "attempts": self.attempts,
+        }
+
+
+status = WarmUpStatus()
+
+
+async def warm_up():
+    steps = [
+        ("database", lambda: Database.warm_up(settings.DATABASE_WARM_CONNECTIONS)),
+        ("prompts", lambda: asyncio.to_thread(preload_prompts)),
+        # Loads the BPE ranks, which tiktoken may first have to download
+        ("tiktoken", lambda: asyncio.to_thread(get_encoding, settings.AGENT_MODEL)),
+        # On the event loop, so it cannot race a request compiling it lazily
+        ("agent", Agent.compile),
+    ]
+    delay = settings.WARMUP_RETRY_INITIAL_DELAY
+    while True:
+        status.attempts += 1
+        failed = []
+        for name, step in steps:
+            start = time.perf_counter()
+            try:
+                result = step()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                status.errors[name] = repr(e)
+                logger.exception("Warm-up step %s failed", name)
+                failed.append((name, step))
+                continue
+            status.errors.pop(name, None)
+            status.steps[name] = round((time.perf_counter() - start) * 1000, 1)
+
+        if not failed:
+            break
+        logger.warning("Retrying warm-up steps %s in %.1fs", [n for n, _ in failed], delay)
+        await asyncio.sleep(delay)
+        steps = failed
+        delay = min(delay * 2, settings.WARMUP_RETRY_MAX_DELAY)
+
+    status.ready = True
+    logger.info("Warm-up finished: %s, attempts: %d", status.steps, status.attempts)